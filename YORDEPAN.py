@@ -1,142 +1,41 @@
-import streamlit as st
+import cProfile
+import io
+import os
+import pstats
+import sqlite3
 import pandas as pd
-from functools import reduce
-from datetime import datetime
-import string
+import streamlit as st
 from time import sleep
-from conllu import parse
+from conllu.exceptions import ParseException
 from streamlit.errors import StreamlitValueAboveMaxError as SVAME
+from bulk import digest, import_files
+from core import serialize
+from corpus import ANNOTATOR, Corpus, parse_sentence
+from journal import Journal, exists as journal_exists, new_token
+from lexicon import END, START, Lexicon
+from metrics import count, setup as setup_log, snapshot, reset as reset_metrics, state_size, timed, timer
+from stats import Columns, agreement, describe
+from store import Store
+from preannotate import available as spacy_available, load_model, preannotate
+from tagsets import DEPREL, FEAT, UPOS
+from tokenizer import get_tokenizer
+from tokenstore import COLUMNS, DuplicateTokenError, Token, TokenStore
+from validate import ERROR, check_sentence
+from worker import export as export_job, run as run_in_background
+
+PREVIEW = 5
+# sentences per page on the BROWSE page
+PAGE_SIZE = 25
+LEXICON_PATH = 'lexicon.json.gz'
+JOURNAL_DIR = 'journal'
+# journals kept open per server process; an idle journal has already closed its file
+JOURNALS = 512
+STORE_PATH = 'treebank.sqlite3'
+# annotator prefix of sentences pre-annotated by spaCy and not yet saved by a person
+MACHINE = 'spaCy'
+# set to show the PERFORMANCE page
+PROFILING = bool(os.environ.get('YORDEPAN_PROFILING'))
 
-UPOS = {'ADJ':'ADJECTIVE',
-         'ADP':'ADPOSITION', 
-         'ADV':'ADVERB', 
-         'AUX':'AUXILLIARY', 
-         'CCONJ':'COORDINATING CONJUNCTION', 
-         'DET':'DETERMINER', 
-         'INTJ':'INTERJECTION', 
-         'NOUN':'NOUN', 
-         'NUM':'NUMBER', 
-         'PART':'PARTICIPLE', 
-         'PRON':'PRONOUN', 
-         'PROPN':'PROPER NOUN', 
-         'PUNCT':'PUNCTUATION', 
-         'SCONJ':'SUBORDINATING CONJUCTION', 
-         'SYM':'SYMBOL', 
-         'VERB':'VERB', 
-         'X':'UNDEFINED - PLEASE INDICATE THE APPROPRIATE POS TAG IN THE XPOS INPUT BOX'}
-DEPREL = {'acl':'clausal modifier of noun (adnominal clause)',
-                    'acl:relcl':'relative clause modifier',
-                    'advcl':'adverbial clause modifier',
-                    'advcl:relcl':'adverbial relative clause modifier',
-                    'advmod':'adverbial modifier',
-                    'advmod:emph':'emphasizing word, intensifier',
-                    'advmod:lmod':'locative adverbial modifier',
-                    'amod':'adjectival modifier',
-                    'appos':'appositional modifier',
-                    'aux':'auxilliary',
-                    'aux:pass':'passive auxilliary',
-                    'case':'case marking',
-                    'cc':'coordinating conjunction',
-                    'cc:preconj':'preconjuction',
-                    'ccomp':'clausal complement',
-                    'clf':'classifier',
-                    'compound':'compound',
-                    'compound:lvc':'light verb construction',
-                    'compound:prt':'phrasal verb particle',
-                    'compound:redup':'reduplicated compounds',
-                    'compound:svc':'serial verb compounds',
-                    'comp:aux':'auxilliary complement',
-                    'conj':'conjunct',
-                    'cop':'copula',
-                    'csubj':'clasual subject',
-                    'csubj:outer':'outer clause clausal subject',
-                    'csubj:pass':'clausal passive subject',
-                    'dep':'unknown dependency',
-                    'det:nomgov':'pronominal quantifier governing the case of the noun',
-                    'det:nummod':'pronominal quantifier agreeing in case with the noun',
-                    'det:poss':'possessive determiner',
-                    'discourse':'discourse element',
-                    'dislocated':'dislocated element',
-                    'expl':'expletive',
-                    'expl:impers':'impersonal expletive',
-                    'expl:pass':'reflexive pronoun used in reflexive passive',
-                    'expl:pv':'reflexive clitic with an inherently reflexive verb',
-                    'foc':'focus marker',
-                    'fixed':'fixed multiword expression',
-                    'flat':'flat expression',
-                    'flat:foreign':'foreign words',
-                    'flat:name':'names',
-                    'goeswith':'goes with',
-                    'iobj':'indirect object',
-                    'list':'list',
-                    'mark':'marker',
-                    'nmod':'nominal modifier',
-                    'nmod:poss':'possessive nominal modifier',
-                    'nmod:tmod':'temporal modifier',
-                    'nsubj':'nominal subject',
-                    'nsubj:outer':'outer clause nominal subject',
-                    'nsubj:pass':'passive nominal subject',
-                    'nummod':'numeric modifier',
-                    'nummod:gov':'numeric modifier governing the case of the noun',
-                    'obj':'object',
-                    'obl':'oblique nominal',
-                    'obl:agent':'oblique agent in passive construction',
-                    'obl:arg':'oblique argument',
-                    'obl:lmod':'locative modifier',
-                    'obl:tmod':'temporal modifier',
-                    'orphan':'orphan',
-                    'parataxis':'parataxis',
-                    'punct':'punctuation',
-                    'reparandum':'overriden disfluency',
-                    'ROOT':'root',
-                    'vocative':'vocative',
-                    'xcomp':'open clausal complement'}
-
-FEAT = {'_':'UNKNOWN/NOT APPLICABLE',
-        'Case=Nom': 'Nominative',
-        'Case=Acc': 'Accusative', 
-        'Case=Gen': 'Genitive',
-        'Case=Dat': 'Dative',
-        'Gender=Masc': 'Masculine',
-        'Gender=Fem': 'Feminine',
-        'Gender=Neut': 'Neuter',
-        'Number=Sing': 'Singular',
-        'Number=Plur': 'Plural',
-        'Tense=Past': 'Past Tense',
-        'Tense=Pres': 'Present Tense',
-        'Tense=Fut': 'Future Tense',
-        'Tense=Non-Fut': 'Non-Future Tense',
-        'Mood=Ind': 'Indicative',
-        'Mood=Imp': 'Imperative',
-        'Mood=Sub': 'Subjunctive',
-        'Person=1': 'First person',
-        'Person=2': 'Second person',
-        'Person=3': 'Third person',
-        'Polarity=Neg': 'Negation',
-        'Polarity=Pos': 'Positive',
-        'Voice=Act': 'Active voice',
-        'Voice=Pass': 'Passive voice',
-        'Aspect=Perf': 'Perfect',
-        'Aspect=Imp': 'Imperfect',
-        'Degree=Pos': 'Positive',
-        'Degree=Cmp': 'Comparative',
-        'Degree=Sup': 'Superlative',
-        'Definite=Def': 'Definite',
-        'Definite=Ind': 'Indefinite',
-        'VerbType=Trans': 'Transitive',
-        'VerbType=Intr': 'Intransitive'}
-
-def tokenize(text:str):
-    letters = [char for char in text]
-    new = []
-    for char in letters:
-        if char not in list(string.punctuation+'£¢©¥≤ϵ≥™≠ꓯ÷®₦№℗'):
-            new.append(char)
-        else:
-            new.extend([' ',char,' '])
-    tokens = reduce(lambda x,y:x+y, new)
-    for i in tokens.split(' ')[:-1]:
-        yield(i)
 
 def intro():
     st.subheader('THIS IS A WEBAPP TO ANNOTATE THE TOKENS PER SENTENCE IN A SEMI-AUTOMATIC MANNER FOR A DEPENDENCY PARSE TREE. THE RESULT CAN BE DOWNLOADED AS .TXT OR .CONLLU FORMAT FOR FURTHER CLEANING, ANALYSIS OR TREEBANK CREATION.')
@@ -208,12 +107,14 @@ def intro():
                 """)
 
 def annotate():
+    token = session_token()
     with st.sidebar:
         st.write('You will be recognized in this effort, if only we know how to address you. You may choose to remain anonymous while tagging though.')
         anon = st.toggle('Turn off to be anonymous', value=True)
         if anon == False:
             if 'USER' in st.session_state:
                 del st.session_state.USER
+                record_session()
                 user = '🥷🏽'
                 st.toast(f'Welcome {user}')
                 st.write('Hello 👋🏾🥷🏽. You are anonymous.')
@@ -228,76 +129,308 @@ def annotate():
                     else:
                         del st.session_state.USER
                         st.session_state.USER = user
+                    record_session()
         source  = st.text_input('WHERE ARE YOU SOURCING YOUR SENTENCE FROM? Leave blank if you are baking this straight off your head!', help='This is for integrity. Leave as blank if the sentence you are annotating is straight off your brain.')
-        if source:
-            if 'SOURCE' not in st.session_state:
-                st.session_state.SOURCE = source
-            else:
-                del st.session_state.SOURCE
-                SOURCE = st.session_state.SOURCE = source
+        if source and source != st.session_state.get('SOURCE'):
+            st.session_state.SOURCE = source
+            record_session()
+        with st.expander('SESSION'):
+            st.write(f'YOUR WORK IS SAVED AS YOU GO. KEEP THIS PAGE\'S LINK, OR THIS TOKEN, TO PICK UP WHERE YOU STOPPED: `{token}`')
+            other = st.text_input('RESTORE A SESSION', placeholder='PASTE A SESSION TOKEN HERE')
+            if st.button('RESTORE') and other:
+                if journal_exists(JOURNAL_DIR, other):
+                    restore_session(other)
+                    st.rerun()
+                else:
+                    st.warning('THERE IS NO SAVED SESSION WITH THIS TOKEN!')
+        if spacy_available():
+            with st.expander('PRE-ANNOTATION (OPTIONAL)'):
+                st.text_input('SPACY MODEL', key='SPACY_MODEL', help='An installed spaCy package (e.g. `en_core_web_sm`), a model folder, or a language code (e.g. `yo`) for a blank pipeline. Nothing is downloaded.')
+                st.number_input('PROCESSES', min_value=1, max_value=os.cpu_count() or 1, key='SPACY_PROCESSES', help='How many processes spaCy may use for batches of raw text.')
 
-    st.write(f'**Hello {st.session_state.USER if 'USER' in st.session_state else '🥷🏽'},** DO NOT LEAVE THIS PAGE WHILE ANNOTATING TO AVOID THE RISK OF LOOSING YOUR DATA!')
+    st.write(f'**Hello {st.session_state.USER if 'USER' in st.session_state else '🥷🏽'},** YOUR WORK IS SAVED AS YOU GO. IF THIS PAGE RELOADS OR THE APP RESTARTS, OPEN THE SAME LINK TO CONTINUE.')
     file_bool = st.toggle('DO YOU WANT TO ADD TO EXISTING FILE(S)?'.capitalize())
     if file_bool:
-        files = st.file_uploader('ONLY .txt and .conllu files ARE ALLOWED!', type = ['conllu', 'txt'], accept_multiple_files=True)
-        process = st.button('PROCESS')
-        if process:
-            if files:
-                try:
-                    for file in files:
-                        content = file.getvalue().decode(encoding = 'utf-8')
-                        try:
-                            sent = parse(content)
-                            if 'CONLLU' not in st.session_state:
-                                st.session_state.CONLLU = content
-                            else:
-                                st.session_state.CONLLU+= content
-                        except:
-                            st.toast(f'COULDN\'T PARSE {file.name}')
-
-                except:
-                    st.toast('YOUR FILE COULD NOT BE PARSED! CHECK FILE AND TRY AGAIN.')
+        upload()
     '___'
-    tokens = []
-    text = st.text_area('**INPUT TEXT HERE:**', placeholder='PLEASE ONLY INPUT ONE SENTENCE HERE. IT MAY BE SIMPLE, COMPOUND, COMPLEX OR COMPOUND-COMPLEX.')
-    button = st.button('ANNOTATE')
+    shared_errors()
+    shared_work(token)
+    text = st.text_area('**INPUT TEXT HERE:**', key='TEXT', placeholder='PLEASE ONLY INPUT ONE SENTENCE HERE. IT MAY BE SIMPLE, COMPOUND, COMPLEX OR COMPOUND-COMPLEX.')
     col1, col2 = st.columns(2)
-    if button:
+    button = col1.button('ANNOTATE')
+    pre = col2.button('PRE-ANNOTATE', disabled=not spacy_available(), help='Let spaCy fill in the table for this sentence, then correct it with ENABLE TABLE EDIT. This replaces anything already tagged for the sentence.')
+    if button or pre:
         if not text:
-            st.subheader('There is nothing to annotate!'.upper())  
-    try:       
-        tokens = [token for token in list(tokenize(text)) if token]
-        with col1.expander('SEE TOKEN(S) AND THEIR ID HERE.'):
-            for i, j in enumerate(tokens if len(text.split(' ')) > 1 else text.split(' '), 1):
-                st.write(f'`{i}` `{j}`')
-    except:
-        pass
+            st.subheader('There is nothing to annotate!'.upper())
+        elif pre:
+            try:
+                st.session_state.DATA = next(preannotate(spacy_model(st.session_state.get('SPACY_MODEL', '')), [split_text(text)[0]]))
+                record('update', text=text, tokens=[list(token) for token in st.session_state.DATA])
+                st.toast('PRE-ANNOTATED! PLEASE CHECK EVERY ROW.')
+            except (ImportError, OSError, ValueError) as error:
+                st.warning(f'SPACY COULD NOT PRE-ANNOTATE THIS SENTENCE: {error}')
+    if not text and 'DATA' in st.session_state:
+        del st.session_state.DATA
+        record('clear')
+    tag_form(text)
+
+@st.cache_resource(max_entries=JOURNALS)
+def session_journal(token:str):
+    return Journal(JOURNAL_DIR, token)
+
+def session_token():
+    '''The token naming this session's journal, kept in the page URL. A URL carrying a saved session restores it.'''
+    if 'JOURNAL' not in st.session_state:
+        token = st.query_params.get('session')
+        if journal_exists(JOURNAL_DIR, token):
+            restore_session(token)
+        else:
+            st.session_state.JOURNAL = new_token()
+        st.query_params['session'] = st.session_state.JOURNAL
+    return st.session_state.JOURNAL
+
+def restore_session(token:str):
+    session = session_journal(token).restore()
+    for key in ('USER', 'SOURCE', 'DATA', 'CONLLU'):
+        if key in st.session_state:
+            del st.session_state[key]
+    if session.user is not None:
+        st.session_state.USER = session.user
+    if session.source is not None:
+        st.session_state.SOURCE = session.source
+    if session.data:
+        st.session_state.DATA = TokenStore(Token(*token) for token in session.data.values())
+        st.session_state.TEXT = session.text or ''
+    if session.sentences or session.digests:
+        st.session_state.CONLLU = Corpus()
+        st.session_state.CONLLU.extend(io.StringIO(''.join(session.sentences)))
+        st.session_state.CONLLU.digests.update(session.digests)
+    st.session_state.JOURNAL = token
+    st.query_params['session'] = token
+    st.toast(f'SESSION RESTORED: {len(session.sentences)} SENTENCE(S){" AND A SENTENCE IN PROGRESS" if session.data else ""}.')
+
+def record(op:str, **payload):
+    journal = session_journal(session_token())
+    journal.record(op, **payload)
+    if journal.needs_compaction():
+        run_in_background(journal.compact)
+
+def record_session():
+    record('session', user=st.session_state.get('USER'), source=st.session_state.get('SOURCE'))
+
+def save_sentences(corpus, start:int, digests=(), shared:bool=True):
+    '''Journals the sentences appended to `corpus` from index `start` on, as one record, and shares them with everyone
+    unless `shared` is off.'''
+    if len(corpus) > start or digests:
+        blocks = [corpus.raw(i).decode('utf-8') for i in range(start, len(corpus))]
+        record('import', sentences=blocks, digests=list(digests))
+        if shared:
+            share_in_background(share_many, blocks)
+
+def share_many(blocks):
+    '''Adds sentences to the shared treebank, keeping the readable ones if some are not.'''
+    errors = []
+    shared_store().add_many(blocks, errors=errors)
+    if errors:
+        raise ValueError(f'{len(errors)} SENTENCE(S) COULD NOT BE READ, STARTING WITH: {errors[0][1]}')
+
+def share_in_background(function, *args):
+    '''Writes to the shared treebank off the script thread; shared_errors() reports it if the write fails.'''
+    st.session_state.setdefault('SHARING', []).append(run_in_background(function, *args))
+
+def shared_errors():
+    '''Warns about background writes to the shared treebank that have failed since the last check.'''
+    futures = st.session_state.get('SHARING')
+    if not futures:
+        return
+    st.session_state.SHARING = [future for future in futures if not future.done()]
+    for future in futures:
+        if future.done() and future.exception() is not None:
+            st.warning(f'SOME SENTENCES ARE SAVED IN YOUR SESSION BUT COULD NOT BE ADDED TO THE SHARED TREEBANK: {future.exception()}')
+
+@st.cache_resource
+def shared_store():
+    return Store(STORE_PATH)
+
+def shared_work(token:str):
+    '''Hands out sentences queued in the shared treebank, one annotator per sentence.'''
+    store = shared_store()
+    if not store.pending(limit=1):
+        return
+    if st.button('GET A SENTENCE FROM THE SHARED TREEBANK', help='Sentences queued by the project team that nobody has annotated yet. The sentence is reserved for you for 30 minutes.'):
+        claim = store.claim(st.session_state.get('USER', token))
+        if claim is None:
+            st.toast('EVERY QUEUED SENTENCE IS BEING ANNOTATED BY SOMEONE ELSE. TRY AGAIN LATER.')
+            return
+        st.session_state.CLAIM = claim
+        st.session_state.TEXT = claim[1]
+        if 'DATA' in st.session_state:
+            del st.session_state.DATA
+            record('clear')
+
+def share(block:str, text:str):
+    '''Adds a converted sentence to the shared treebank, filling in the queued one if that is what was annotated.'''
+    store, claim = shared_store(), st.session_state.pop('CLAIM', None)
+    try:
+        if not (claim and claim[1] == text and store.annotate(claim[0], block)):
+            store.add(block)
+    except sqlite3.Error as error:
+        st.warning(f'THIS SENTENCE IS SAVED IN YOUR SESSION BUT COULD NOT BE ADDED TO THE SHARED TREEBANK: {error}')
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def split_text(text:str):
+    with timed('tokenize', chars=len(text)) as fields:
+        tokens = tuple(get_tokenizer().tokenize(text))
+        fields['tokens'] = len(tokens)
+    listing = '  \n'.join(f'`{i}` `{j}`' for i, j in enumerate(tokens if len(text.split(' ')) > 1 else text.split(' '), 1))
+    return tokens, listing
+
+@st.cache_resource
+def shared_lexicon():
+    return Lexicon.load(LEXICON_PATH)
+
+def learn(sentences):
+    lexicon = shared_lexicon()
+    lexicon.add_sentences(sentences)
+    run_in_background(lexicon.save, LEXICON_PATH)
+
+def drafted(sentence):
+    '''Whether `sentence` is a pre-annotation nobody has saved yet, so the lexicon has not learnt from it.'''
+    return str(sentence.metadata.get(ANNOTATOR, '')).startswith(f'{MACHINE} (')
+
+def relearn(old, new):
+    '''Swaps what the lexicon learnt from an edited sentence for its new version, so saving twice counts it once.'''
+    lexicon = shared_lexicon()
+    lexicon.replace_sentence(old, new)
+    run_in_background(lexicon.save, LEXICON_PATH)
+
+def suggest(tokens, form):
+    '''Form defaults for the selected token, pre-filled from the shared lexicon.'''
+    hint = {'id': 1, 'lemma': form.lower() if form else '_', 'upos': 0, 'feats': [], 'head': 0, 'deprel': 0}
+    if not form or form not in tokens:
+        return hint
+    data = st.session_state.DATA if 'DATA' in st.session_state else ()
+    positions = [i for i, token in enumerate(tokens, 1) if token == form]
+    hint['id'] = next((i for i in positions if i not in data), positions[0])
+    lexicon = shared_lexicon()
+    def upos_at(i):
+        if i < 1 or i > len(tokens):
+            return START if i < 1 else END
+        if i in data:
+            return data[i].UPOS
+        found = lexicon.suggest(tokens[i-1])
+        return found[1] if found else '_'
+    found = lexicon.suggest(form)
+    if found:
+        lemma, upos, feats = found
+        hint['lemma'] = lemma if lemma != '_' else hint['lemma']
+        hint['upos'] = list(UPOS).index(upos) if upos in UPOS else 0
+        hint['feats'] = [] if feats == '_' else feats.split('|')
+        arc = lexicon.suggest_arc(upos, upos_at(hint['id'] - 1), upos_at(hint['id'] + 1))
+        if arc:
+            deprel, offset = arc
+            hint['deprel'] = list(DEPREL).index(deprel) if deprel in DEPREL else 0
+            hint['head'] = 0 if offset == 0 else min(max(hint['id'] + offset, 1), len(tokens))
+    return hint
+
+@st.cache_resource(show_spinner='LOADING SPACY MODEL...')
+def spacy_model(name:str):
+    return load_model(name)
+
+def import_raw_text(files):
+    nlp = spacy_model(st.session_state.get('SPACY_MODEL', ''))
+    tokenizer = get_tokenizer()
+    bar = st.progress(0.0, text='PRE-ANNOTATING...')
+    for number, file in enumerate(files, 1):
+        start = len(st.session_state.CONLLU)
+        lines = [line.strip() for line in file.getvalue().decode('utf-8').splitlines() if line.strip()]
+        stores = preannotate(nlp, tokenizer.tokenize_batch(lines), n_process=st.session_state.get('SPACY_PROCESSES', 1))
+        sentences = []
+        for text, store in zip(lines, stores):
+            sentences.append(st.session_state.CONLLU[st.session_state.CONLLU.add(serialize(store, text, f'{MACHINE} ({nlp.meta.get("name", "blank")})', file.name))])
+        # pre-annotations are drafts: the shared treebank only queues their text for someone to annotate
+        save_sentences(st.session_state.CONLLU, start, shared=False)
+        share_in_background(shared_store().add_texts, lines, file.name)
+        # nor does the lexicon learn from them until an annotator saves a corrected version
+        bar.progress(number/len(files), text=f'{number}/{len(files)} FILES PRE-ANNOTATED ({file.name})')
+        st.toast(f'{file.name}: {len(sentences)} SENTENCE(S) PRE-ANNOTATED AND ADDED.')
+
+@st.fragment
+@timer('fragment_upload')
+def upload():
+    files = st.file_uploader('ONLY .txt and .conllu files ARE ALLOWED!', type = ['conllu', 'txt'], accept_multiple_files=True)
+    shared_errors()
+    raw = st.toggle('THESE ARE RAW TEXT FILES (ONE SENTENCE PER LINE): PRE-ANNOTATE THEM WITH SPACY', disabled=not spacy_available())
+    process = st.button('PROCESS')
+    if process and raw:
+        if files:
+            if 'CONLLU' not in st.session_state:
+                st.session_state.CONLLU = Corpus()
+            try:
+                with timed('upload_parse', files=len(files), raw=True):
+                    import_raw_text(files)
+            except (ImportError, OSError, ValueError, UnicodeDecodeError, ParseException) as error:
+                st.warning(f'SPACY COULD NOT PRE-ANNOTATE YOUR FILES: {error}')
+    elif process:
+        if files:
+            if 'CONLLU' not in st.session_state:
+                st.session_state.CONLLU = Corpus()
+            bar = st.progress(0.0, text='PROCESSING FILES...')
+            def progress(done, total, report):
+                bar.progress(done/total, text=f'{done}/{total} FILES PROCESSED ({report.name})')
+            start = len(st.session_state.CONLLU)
+            try:
+                with timed('upload_parse', files=len(files)) as fields:
+                    reports = import_files(((file.name, file.getvalue()) for file in files), st.session_state.CONLLU, progress)
+                    fields['sentences'] = sum(len(report.sentences) for report in reports)
+            except:
+                st.toast('YOUR FILE COULD NOT BE PARSED! CHECK FILE AND TRY AGAIN.')
+            else:
+                save_sentences(st.session_state.CONLLU, start, [report.digest for report in reports if not report.skipped])
+                learn(sentence for report in reports for sentence in report.sentences)
+                for report in reports:
+                    if report.skipped:
+                        st.toast(f'{report.name} HAS ALREADY BEEN ADDED. SKIPPED.')
+                    elif report.errors or report.issues:
+                        with st.expander(f'⚠ {report.name}: {len(report.sentences)} SENTENCE(S) ADDED, {len(report.errors)} COULD NOT BE PARSED, {len(report.issues)} TREE ISSUE(S)'):
+                            for line, error in report.errors:
+                                st.write(f'`LINE {line}`: {error}')
+                            for issue in report.issues:
+                                st.write(f'`LINE {issue.line}` `{issue.level}` {issue.sent_id} {f"#{issue.token}" if issue.token is not None else ""}: {issue.message}')
+                    else:
+                        st.toast(f'{report.name}: {len(report.sentences)} SENTENCE(S) ADDED.')
+
+@st.fragment
+@timer('fragment_tag_form')
+def tag_form(text:str):
+    tokens, listing = split_text(text) if text else ((), '')
+    col1, col2 = st.columns(2)
+    with col1.expander('SEE TOKEN(S) AND THEIR ID HERE.'):
+        st.markdown(listing)
 
     form = col2.selectbox('SELECT WORD TO TAG HERE', options = tokens if len(text.split(' '))>1 else text)
 
-    multi = col2.toggle(label='MULTITOKEN?', help = 'Tick this if the token you want to tag is a multiword token like `New York` or `sáré (sá + eré)`')
+    multi = col2.toggle(label='MULTITOKEN?', help = 'Tick this if the token you want to tag is a multiword token like `New York` or `sáré (sá + eré)`')
     if multi:
         MWA = col2.number_input(label = 'HOW MANY TOKENS MAKE UP THIS WORD?', min_value=2, help = 'This is the amount of tokens that make up the `FORM`. Note that this should tally with the amount of tokens you will input in the `LEMMA` box.')
 
+    hint = suggest(tokens, form)
     with st.form(key='form', clear_on_submit=False, enter_to_submit=False, border=False):
-        if not text and 'DATA' in st.session_state:
-            del st.session_state.DATA
-
         col1, col2, col3 = st.columns(3)
         col2.metric('TOKEN SELECTED:', value=form, border = True, width = 'content')
         try:
-            id = st.number_input('SELECT ID HERE', min_value=1, max_value=len(tokens))
+            id = st.number_input('SELECT ID HERE', min_value=1, max_value=len(tokens), value=hint['id'])
         except SVAME:
             id = st.number_input('SELECT ID HERE:', min_value=0, max_value=0)
         col1, col2, col3 = st.columns(3)
-        lemma = col1.text_input('ENTER LEMMA HERE', value = form.lower() if form else '_')
-        upos = col2.selectbox('SELECT UNIVERSAL PART OF SPEECH HERE:', options = UPOS, index = 0)
+        lemma = col1.text_input('ENTER LEMMA HERE', value = hint['lemma'])
+        upos = col2.selectbox('SELECT UNIVERSAL PART OF SPEECH HERE:', options = UPOS, index = hint['upos'])
         xpos = col3.text_input('INPUT XPOS TAG HERE', value = '_')
         
         col1, col2, col3 = st.columns(3)
-        feat = col1.multiselect(label='FEAT', options = FEAT if form.lower() else '', accept_new_options=True)
-        head = col2.number_input('HEAD', min_value = 0, max_value=len(tokens))
-        deprel = col3.selectbox('SELECT DEPENDENCY HERE:', options = DEPREL.keys())       
+        feat = col1.multiselect(label='FEAT', options = list(FEAT) + [f for f in hint['feats'] if f not in FEAT] if form.lower() else '', default = hint['feats'], accept_new_options=True)
+        head = col2.number_input('HEAD', min_value = 0, max_value=len(tokens), value = hint['head'])
+        deprel = col3.selectbox('SELECT DEPENDENCY HERE:', options = DEPREL.keys(), index = hint['deprel'])
         deps = st.text_input('INPUT SECONDARY DEPENDENCY HERE:',
                              help='Enhanced dependency graph in the form of a list of head-deprel pairs. Please separate multiple dependencies with a |. For example; ***0 : acl | 3 : nsubj | 0 : csubj***',
                              value = '_')
@@ -317,80 +450,302 @@ def annotate():
                 elif (deprel == 'ROOT' and head != 0):
                     st.badge('ANY TOKEN TAGGED AS ROOT SHOULD HAVE THEIR HEADS AS ZERO!', color ='red')
                     st.stop()
-                else:    
-                    df = {'ID':[id],
-                        'FORM':[form],
-                        'LEMMA':[lemma],
-                        'UPOS':[upos],
-                        'XPOS':[xpos] if xpos else ['_'],
-                        'FEATS':['|'.join(feat)] if feat else ['_'],
-                        'HEAD':[head],
-                        'DEPREL':[deprel],
-                        'DEPS':[deps] if deps and deps != f'{head}:{deprel}' else ['_'],
-                        'MISC':[misc] if misc else ['_']
-                        }
-                    data = pd.DataFrame(df)
-                    if 'DATA' not in st.session_state:
-                        st.session_state.DATA = data.dropna(how = 'all')
-                    else:
-                        st.session_state.DATA = data = pd.concat([st.session_state['DATA'], data], ignore_index=True).dropna(how='all')
+                elif ('DATA' in st.session_state and id in st.session_state.DATA):
+                    st.warning(f'ID {id} HAS ALREADY BEEN TAGGED! ENABLE TABLE EDIT TO CHANGE IT.')
+                    st.stop()
+                else:
+                    token = Token(id, form, lemma, upos, xpos,
+                                  '|'.join(feat) if feat else '_',
+                                  head, deprel,
+                                  deps if deps and deps != f'{head}:{deprel}' else '_',
+                                  misc)
+                    with timed('tag'):
+                        if 'DATA' not in st.session_state:
+                            st.session_state.DATA = TokenStore()
+                        st.session_state.DATA.add(token)
+                        record('tag', text=text, token=list(token))
+                    count('tag')
             except:
                 st.warning('THERE IS NOTHING TO TAG!')
                 with st.snow():
                     sleep(3)
 
+    token_table(text, tokens)
+
+@st.fragment
+@timer('fragment_token_table')
+def token_table(text:str, tokens):
     if 'DATA' not in st.session_state:
         st.info('TAG A SENTENCE, MAKE EDITS TO AN EXISTING FILE, DOWNLOAD CHANGES OR NEW ANNOTATION IN .conllu or .txt')
+        if 'CONLLU' in st.session_state and len(st.session_state.CONLLU):
+            downloads()
     else:
         edit_table = st.toggle('ENABLE TABLE EDIT')        
         if edit_table:
-            new_df = st.data_editor(st.session_state.DATA, disabled=False)
-            new_df = new_df.dropna(how='any').reset_index()
-            del new_df['index']
-            new_df['ID'] = new_df['ID'].apply(lambda x:int(x))
-            new_df['HEAD'] = new_df['HEAD'].apply(lambda x :int(x))
+            new_df = st.data_editor(st.session_state.DATA.to_frame(), disabled=False)
+            with timed('normalize', rows=len(new_df)):
+                # only rows left completely empty are dropped: pre-annotated rows may still be waiting for a HEAD
+                new_df = new_df.dropna(how='all').reset_index(drop=True)
+                new_df = new_df.fillna({column: '_' for column in COLUMNS if column not in ('ID', 'HEAD')})
+                new_df['ID'] = new_df['ID'].astype('Int64')
+                new_df['HEAD'] = new_df['HEAD'].astype('Int64')
             st.write('EDITED TABLE:')
             st.dataframe(new_df)
             update = st.button('UPDATE')
             if update:
-                st.session_state.DATA = new_df
-                st.toast('UPDATE SUCCESSFULL!\nYou can toggle ENABLE TABLE EDIT off now.')
+                if new_df['ID'].isna().any():
+                    st.warning('EVERY ROW NEEDS AN ID! PLEASE CORRECT.')
+                    st.stop()
+                if ((new_df['HEAD'] < 0) | (new_df['HEAD'] > len(tokens))).any():
+                    st.warning(f'HEAD MUST BE BETWEEN 0 AND {len(tokens)}! PLEASE CORRECT.')
+                    st.stop()
+                try:
+                    with timed('update', rows=len(new_df)):
+                        st.session_state.DATA = TokenStore.from_frame(new_df)
+                    count('update')
+                    record('update', text=text, tokens=[list(token) for token in st.session_state.DATA])
+                    st.toast('UPDATE SUCCESSFULL!\nYou can toggle ENABLE TABLE EDIT off now.')
+                except DuplicateTokenError as error:
+                    st.warning(f'ID {error.args[0]} APPEARS MORE THAN ONCE IN THE EDITED TABLE! PLEASE CORRECT.')
         else:
-            st.session_state.DATA = st.session_state.DATA.sort_values(by=['ID']).reset_index()
-            del st.session_state.DATA['index']
-            st.session_state.DATA['ID'] = st.session_state.DATA['ID'].apply(lambda x:int(x))
-            st.session_state.DATA['HEAD'] = st.session_state.DATA['HEAD'].apply(lambda x :int(x))
-            st.dataframe(st.session_state.DATA)
-        
-            cnlu = st.button('CONVERT', help='CONVERT YOUR TAGGED DATA TO CONLL-U FORMAT TO DOWNLOAD', type='primary')
-            if cnlu:
-                ID = list(st.session_state.DATA['ID'])
-                if len(ID) != len(tokens):
-                    st.warning('THERE ARE SOME TOKENS YOU HAVE NOT TAGGED!')
-                else:
-                    st.balloons()
-                    st.toast('DONE!')
-                    
-                    new = [f'\n\n# ANNOTATOR = {st.session_state.USER if 'USER' in st.session_state else 'ANONYMOUS'}\n# Text = {text}\n# Ref = {st.session_state.SOURCE if 'SOURCE' in st.session_state else 'OTHER'}']
-                    for i in st.session_state.DATA.itertuples():
-                        new.append(f'{i.ID}\t{i.FORM}\t{i.LEMMA}\t{i.UPOS}\t{i.XPOS}\t{i.FEATS}\t{i.HEAD}\t{i.DEPREL}\t{i.DEPS}\t{i.MISC}')
-                    new = '\n'.join(new)
-                    
-                    if 'CONLLU' not in st.session_state:
-                        st.session_state.CONLLU = new
-                    else:
-                        st.session_state.CONLLU+= new
-
-                    with st.expander('SEE YOUR .CONLLU DATA'):
-                        st.code(st.session_state.CONLLU)
-                    
-                    del st.session_state.DATA
-                    sent = parse(st.session_state['CONLLU'])
-                    with st.popover('Download Options'):
-                        st.badge('DOWNLOAD AS:')
-                        col1, col2 = st.columns(2)
-                        col1.download_button('.conllu', st.session_state.CONLLU, file_name='dep.conllu')
-                        col2.download_button('.txt', st.session_state.CONLLU, file_name='dep.txt')
+            st.dataframe(st.session_state.DATA.to_frame())
+            export(text, tokens)
+
+@st.fragment
+@timer('fragment_export')
+def export(text:str, tokens):
+    if 'DATA' not in st.session_state:
+        return
+    cnlu = st.button('CONVERT', help='CONVERT YOUR TAGGED DATA TO CONLL-U FORMAT TO DOWNLOAD', type='primary')
+    if cnlu:
+        if len(st.session_state.DATA) != len(tokens):
+            st.warning('THERE ARE SOME TOKENS YOU HAVE NOT TAGGED!')
+        elif any(token.HEAD is None for token in st.session_state.DATA):
+            st.warning('SOME TOKENS HAVE NO HEAD YET! ENABLE TABLE EDIT TO FILL THEM IN.')
+        else:
+            with timed('convert', tokens=len(tokens)):
+                new = serialize(st.session_state.DATA, text,
+                                st.session_state.USER if 'USER' in st.session_state else 'ANONYMOUS',
+                                st.session_state.SOURCE if 'SOURCE' in st.session_state else 'OTHER')
+
+                if 'CONLLU' not in st.session_state:
+                    st.session_state.CONLLU = Corpus()
+                try:
+                    learn([st.session_state.CONLLU[st.session_state.CONLLU.add(new)]])
+                except ParseException:
+                    st.warning('THIS SENTENCE COULD NOT BE CONVERTED TO CONLL-U! CHECK THE TABLE AND TRY AGAIN.')
+                    st.stop()
+                record('convert', sentence=new)
+                share(new, text)
+            count('convert')
+            st.balloons()
+            st.toast('DONE!')
+            del st.session_state.DATA
+            export_job(st.session_state.CONLLU)
+            downloads()
+
+@st.fragment
+@timer('fragment_downloads')
+def downloads():
+    job = export_job(st.session_state.CONLLU)
+    if not job.done():
+        try:
+            job.result(timeout=0.5)
+        except TimeoutError:
+            download_progress()
+            return
+    payload = job.result()
+    with st.expander(f'SEE YOUR .CONLLU DATA (LAST {min(PREVIEW, len(st.session_state.CONLLU))} OF {len(st.session_state.CONLLU)} SENTENCES)'):
+        st.code(st.session_state.CONLLU.tail(PREVIEW))
+    with st.popover('Download Options'):
+        st.badge('DOWNLOAD AS:')
+        extension = st.radio('FORMAT', ['.conllu', '.txt'], horizontal=True, label_visibility='collapsed')
+        st.download_button(f'DOWNLOAD {extension}', payload, file_name=f'dep{extension}', mime='text/plain')
+
+@st.fragment(run_every=0.5)
+def download_progress():
+    job = export_job(st.session_state.CONLLU)
+    if job.done():
+        st.rerun()
+    st.progress(job.progress, text=f'PREPARING YOUR DOWNLOAD ({job.sentences} SENTENCES)...')
+
+def search_corpus(corpus, text:str, sent_id:str, annotator):
+    '''Indices matching the search, kept in the session until the terms or the corpus change.'''
+    key = (id(corpus), corpus.version, text, sent_id, annotator)
+    hits = st.session_state.get('BROWSE_HITS')
+    if hits is None or hits[0] != key:
+        hits = st.session_state.BROWSE_HITS = (key, corpus.search(text, sent_id, annotator))
+    return hits[1]
+
+def browse():
+    st.subheader('BROWSE AND EDIT THE SENTENCES OF THIS SESSION')
+    corpus = st.session_state.get('CONLLU')
+    if not corpus:
+        st.info('YOU HAVE NOT CONVERTED OR ADDED ANY SENTENCE IN THIS SESSION YET.')
+        return
+    col1, col2, col3 = st.columns(3)
+    text = col1.text_input('SEARCH THE TEXT').strip()
+    sent_id = col2.text_input('SEARCH THE SENT_ID').strip()
+    annotator = col3.selectbox('ANNOTATOR', ['EVERYONE'] + corpus.annotators())
+    hits = search_corpus(corpus, text, sent_id, None if annotator == 'EVERYONE' else annotator)
+    if not hits:
+        st.warning('NO SENTENCE MATCHES YOUR SEARCH.')
+        return
+    pages = (len(hits) - 1) // PAGE_SIZE + 1
+    terms = f'{text}|{sent_id}|{annotator}'
+    page = st.number_input(f'PAGE (OF {pages})', min_value=1, max_value=pages, value=1, key=f'BROWSE_PAGE:{terms}')
+    visible = hits[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]
+    st.caption(f'{len(hits)} OF {len(corpus)} SENTENCE(S) MATCH. SELECT ONE TO EDIT IT.')
+    rows = pd.DataFrame([corpus.row(index) for index in visible], columns=['SENT_ID', 'ANNOTATOR', 'SOURCE', 'TEXT'],
+                        index=pd.Index([index + 1 for index in visible], name='#'))
+    selection = st.dataframe(rows, on_select='rerun', selection_mode='single-row', key=f'BROWSE_TABLE:{terms}:{page}')
+    rows = selection['selection']['rows']
+    if rows:
+        sentence_editor(visible[rows[0]])
+
+@st.fragment
+@timer('fragment_sentence_editor')
+def sentence_editor(index:int):
+    '''Edits one sentence of the corpus in place; only that sentence is parsed, checked and written back.'''
+    corpus = st.session_state.CONLLU
+    lines = corpus.raw(index).decode('utf-8').strip('\n').split('\n')
+    sent_id, *_ = corpus.row(index)
+    st.write(f'EDITING SENTENCE {index + 1}{f" ({sent_id})" if sent_id else ""}:')
+    key = f'{index}:{corpus.version}'
+    comments = st.text_area('COMMENTS', '\n'.join(line for line in lines if line.startswith('#')), key=f'EDIT_COMMENTS:{key}')
+    rows = [line.split('\t') for line in lines if line and not line.startswith('#')]
+    if any(len(row) != len(COLUMNS) for row in rows):
+        st.warning(f'SOME ROWS OF THIS SENTENCE DO NOT HAVE {len(COLUMNS)} FIELDS. MISSING FIELDS ARE SHOWN AS _ AND EXTRA ONES ARE DROPPED WHEN YOU SAVE.')
+    table = pd.DataFrame([(row + ['_'] * len(COLUMNS))[:len(COLUMNS)] for row in rows], columns=list(COLUMNS))
+    table = st.data_editor(table, num_rows='dynamic', hide_index=True, key=f'EDIT_TABLE:{key}')
+    if st.button('SAVE SENTENCE', type='primary'):
+        table = table.fillna('_').astype(str).apply(lambda column: column.str.strip()).replace('', '_')
+        table = table[(table != '_').any(axis=1)]
+        block = '\n'.join([line.strip() for line in comments.split('\n') if line.strip()] + ['\t'.join(row) for row in table.itertuples(index=False)]) + '\n\n'
+        try:
+            sentence = parse_sentence(block)
+        except (ParseException, ValueError) as error:
+            st.warning(f'THIS SENTENCE COULD NOT BE PARSED! CHECK THE TABLE AND TRY AGAIN. {error}')
+            return
+        errors = [issue for issue in check_sentence(sentence) if issue.level == ERROR]
+        if errors:
+            for issue in errors:
+                st.warning(f'{f"#{issue.token}: " if issue.token is not None else ""}{issue.message}')
+            return
+        old = corpus[index]
+        if drafted(old) and drafted(sentence):
+            # saving a pre-annotation confirms it: it is credited to the annotator and learnt from now on
+            sentence.metadata[ANNOTATOR] = st.session_state.USER if 'USER' in st.session_state else 'ANONYMOUS'
+            block = sentence.serialize()
+        with timed('edit', tokens=len(table)):
+            corpus.replace(index, block)
+            record('edit', index=index, sentence=corpus.raw(index).decode('utf-8'))
+        count('edit')
+        if drafted(old):
+            learn([corpus[index]])
+        else:
+            relearn(old, corpus[index])
+        st.toast(f'SENTENCE {index + 1} SAVED!')
+        st.rerun()
+
+@st.cache_data(max_entries=8, show_spinner='READING THE TREEBANK...')
+def treebank_columns(content_hash:str, _load):
+    return _load()
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def treebank_summary(content_hash:str, _columns):
+    return describe(_columns)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def annotator_agreement(content_hash:str, gold:str, other:str, _columns):
+    return agreement(_columns.by_annotator(gold), _columns.by_annotator(other))
+
+def statistics():
+    st.subheader('TREEBANK STATISTICS AND INTER-ANNOTATOR AGREEMENT')
+    origin = st.radio('WHICH SENTENCES?', ['THIS SESSION', 'SHARED TREEBANK', 'FILES'], horizontal=True)
+    if origin == 'THIS SESSION':
+        corpus = st.session_state.get('CONLLU')
+        if not corpus:
+            st.info('YOU HAVE NOT CONVERTED OR ADDED ANY SENTENCE IN THIS SESSION YET.')
+            return
+        content_hash = f'session:{corpus.content_hash()}'
+        load = lambda: Columns.from_blocks(corpus.raw(i).decode('utf-8') for i in range(len(corpus)))
+    elif origin == 'SHARED TREEBANK':
+        store = shared_store()
+        content_hash = f'store:{store.version()}'
+        load = lambda: Columns.from_blocks(store.iter_blocks())
+    else:
+        files = st.file_uploader('ONLY .conllu FILES ARE ALLOWED! WITH TWO OR MORE FILES, EACH FILE IS COMPARED AS ONE ANNOTATOR\'S VERSION.', type=['conllu'], accept_multiple_files=True)
+        if not files:
+            return
+        content_hash = 'files:' + digest('\n'.join(f'{file.name}:{digest(file.getvalue())}' for file in files).encode('utf-8'))
+        load = lambda: Columns.concat(Columns.from_blocks((file.getvalue().decode('utf-8'),), file.name if len(files) > 1 else None) for file in files)
+    columns = treebank_columns(content_hash, load)
+    summary = treebank_summary(content_hash, columns)
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric('SENTENCES', summary['sentences'], border=True)
+    col2.metric('TOKENS', summary['tokens'], border=True)
+    col3.metric('TOKENS PER SENTENCE', f'{summary["mean_length"]:.1f}', border=True)
+    col4.metric('ANNOTATORS', len(summary['annotators']), border=True)
+    tab1, tab2 = st.tabs(['DISTRIBUTIONS', 'AGREEMENT'])
+    with tab1:
+        col1, col2 = st.columns(2)
+        col1.write('UPOS')
+        col1.bar_chart(pd.Series(summary['upos'], name='TOKENS'), horizontal=True)
+        col2.write('DEPREL')
+        col2.bar_chart(pd.Series(summary['deprel'], name='TOKENS'), horizontal=True)
+        st.write('SENTENCE LENGTH (TOKENS)')
+        st.bar_chart(pd.Series(summary['lengths'], name='SENTENCES'))
+        with st.expander('SENTENCES PER ANNOTATOR'):
+            st.dataframe(pd.Series(summary['annotators'], name='SENTENCES'))
+    with tab2:
+        annotators = list(summary['annotators'])
+        if len(annotators) < 2:
+            st.info('AGREEMENT NEEDS AT LEAST TWO ANNOTATORS (OR TWO FILES) THAT TAGGED THE SAME SENTENCES.')
+            return
+        col1, col2 = st.columns(2)
+        gold = col1.selectbox('REFERENCE ANNOTATION', annotators)
+        other = col2.selectbox('COMPARED WITH', [annotator for annotator in annotators if annotator != gold])
+        scores = annotator_agreement(content_hash, gold, other, columns)
+        if not scores['sentences']:
+            st.warning(f'{gold} AND {other} HAVE NOT TAGGED ANY SENTENCE IN COMMON.')
+            return
+        st.caption(f'{scores["sentences"]} SENTENCE(S) AND {scores["tokens"]} TOKEN(S) IN COMMON. {scores["only_gold"]} SENTENCE(S) ONLY BY {gold}, {scores["only_other"]} ONLY BY {other}.')
+        col1, col2, col3, col4, col5 = st.columns(5)
+        col1.metric('UAS', f'{scores["UAS"]:.2%}', help='Tokens given the same HEAD', border=True)
+        col2.metric('LAS', f'{scores["LAS"]:.2%}', help='Tokens given the same HEAD and DEPREL', border=True)
+        col3.metric('UPOS ACCURACY', f'{scores["UPOS"]:.2%}', help='Tokens given the same UPOS', border=True)
+        col4.metric('UPOS KAPPA', f'{scores["UPOS_KAPPA"]:.3f}', help="Cohen's kappa: agreement corrected for chance", border=True)
+        col5.metric('DEPREL KAPPA', f'{scores["DEPREL_KAPPA"]:.3f}', help="Cohen's kappa: agreement corrected for chance", border=True)
+
+def profiled(page):
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(page)
+    finally:
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(40)
+        st.session_state.PROFILE_REPORT = report.getvalue()
+
+def performance():
+    st.subheader('PERFORMANCE OF THIS SERVER PROCESS')
+    counters, timings = snapshot()
+    col1, col2 = st.columns([3, 1])
+    col1.write('TIMINGS (MILLISECONDS)')
+    col1.dataframe(pd.DataFrame.from_dict(timings, orient='index').sort_values('total_ms', ascending=False) if timings else pd.DataFrame())
+    col2.write('COUNTERS')
+    col2.dataframe(pd.Series(counters, name='COUNT', dtype='int64'))
+    st.write('THIS SESSION\'S STATE (BYTES)')
+    st.dataframe(pd.Series(state_size(st.session_state), name='BYTES', dtype='int64'))
+    if st.button('RESET TIMINGS AND COUNTERS'):
+        reset_metrics()
+        st.rerun()
+    '___'
+    st.session_state.PROFILE = st.toggle('PROFILE THIS SESSION\'S RERUNS WITH cProfile', value=st.session_state.get('PROFILE', False),
+                                         help='Runs every other page of this session under cProfile and keeps the report of the latest rerun here.')
+    if 'PROFILE_REPORT' in st.session_state:
+        with st.expander('LATEST PROFILE (SORTED BY CUMULATIVE TIME)'):
+            st.code(st.session_state.PROFILE_REPORT)
 
 if __name__ == "__main__":
     st.set_page_config(
@@ -399,12 +754,23 @@ if __name__ == "__main__":
     layout="wide",
     initial_sidebar_state="auto",
 ) 
-    print(f'\nLOG ISSUES @ {datetime.now().strftime('%H:%M:%S')} (THIS IS NOT AN ISSUE. ONLY CRITICAL ISSUES WILL CRASH THE APP)',
-          file = open('log.txt', 'w', buffering=1, errors = 'error'))
+    setup_log()
     
     function_pages = {
     'INTRO':intro,
-    'ANNOTATE': annotate
+    'ANNOTATE': annotate,
+    'BROWSE': browse,
+    'STATISTICS': statistics
 }
+    if PROFILING:
+        function_pages['PERFORMANCE'] = performance
     options = st.sidebar.selectbox('CHOOSE AN ACTION HERE:', function_pages.keys())
-    function_pages[options]()
\ No newline at end of file
+    count('rerun')
+    with timed('rerun', page=options) as fields:
+        try:
+            if PROFILING and st.session_state.get('PROFILE') and options != 'PERFORMANCE':
+                profiled(function_pages[options])
+            else:
+                function_pages[options]()
+        finally:
+            fields['state_bytes'] = sum(state_size(st.session_state).values())
\ No newline at end of file
@@ -0,0 +1,30 @@
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from preannotate import available, load_model, preannotate
+from tokenizer import tokenize_batch
+
+SENTENCE = 'Ọlọ́run dá ayé, ó sì dá ènìyàn (gẹ́gẹ́ bí àwòrán rẹ̀); ₦500 ni owó náà!'
+
+
+def run(model='', counts=(1_000, 10_000), processes=(1, 2, 4)):
+    '''Sentences per second through `preannotate` for a blank pipeline or a local model (first argument).'''
+    nlp = load_model(model)
+    print(f'MODEL: {model or "blank (xx)"} PIPES: {nlp.pipe_names}')
+    print(f'{"SENTENCES":>10} {"PROCESSES":>10} {"SECONDS":>9} {"SENT/S":>9}')
+    for count in counts:
+        sentences = tokenize_batch([SENTENCE] * count)
+        for n_process in processes:
+            start = perf_counter()
+            done = sum(1 for _ in preannotate(nlp, sentences, n_process=n_process))
+            seconds = perf_counter() - start
+            assert done == count
+            print(f'{count:>10} {n_process:>10} {seconds:>9.2f} {count / seconds:>9.0f}')
+
+
+if __name__ == '__main__':
+    if not available():
+        sys.exit('spaCy is not installed')
+    run(sys.argv[1] if len(sys.argv) > 1 else '')
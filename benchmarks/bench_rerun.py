@@ -0,0 +1,54 @@
+import os
+import sys
+from statistics import median
+from time import perf_counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from streamlit.testing.v1 import AppTest
+
+from tokenizer import get_tokenizer
+from tokenstore import Token, TokenStore
+
+TEXT = ' '.join(['Ọlọ́run dá ayé, ó sì dá ènìyàn gẹ́gẹ́ bí àwòrán rẹ̀;'] * 8) + ' .'
+
+
+def tagged_store(text):
+    tokens = get_tokenizer().tokenize(text)
+    return TokenStore(Token(id, form, form.lower(), 'NOUN', '_', '_', 0 if id == 1 else 1, 'ROOT' if id == 1 else 'dep')
+                      for id, form in enumerate(tokens[:-1], 1))
+
+
+def fragment_page(text):
+    import YORDEPAN
+    YORDEPAN.tag_form(text)
+
+
+def timed(app, runs):
+    times = []
+    for _ in range(runs):
+        start = perf_counter()
+        app.run()
+        times.append(perf_counter() - start)
+    assert not app.exception, app.exception
+    return median(times) * 1e3
+
+
+def run(runs=15):
+    os.chdir(ROOT)
+    full = AppTest.from_file(os.path.join(ROOT, 'YORDEPAN.py'), default_timeout=60)
+    full.run()
+    full.sidebar.selectbox[0].select('ANNOTATE').run()
+    full.text_area[0].input(TEXT).run()
+    full.session_state.DATA = tagged_store(TEXT)
+
+    fragment = AppTest.from_function(fragment_page, args=(TEXT,), default_timeout=60)
+    fragment.session_state.DATA = tagged_store(TEXT)
+
+    print(f'{len(get_tokenizer().tokenize(TEXT))} TOKENS, {len(full.session_state.DATA)} TAGGED')
+    print(f'WHOLE PAGE RERUN:  {timed(full, runs):8.1f} ms (median of {runs})')
+    print(f'TAG FORM FRAGMENT: {timed(fragment, runs):8.1f} ms (median of {runs})')
+
+
+if __name__ == '__main__':
+    run()
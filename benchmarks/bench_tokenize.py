@@ -0,0 +1,46 @@
+import os
+import sys
+import string
+from functools import reduce
+from timeit import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tokenizer import tokenize, tokenize_batch
+
+SENTENCE = 'Ọlọ́run dá ayé, ó sì dá ènìyàn (gẹ́gẹ́ bí àwòrán rẹ̀); ₦500 ni owó náà! '
+# a combining mark after punctuation, which the tokenize() shim must still split like the old function
+PARITY = SENTENCE + 'a.\u0301b c '
+
+
+def legacy_tokenize(text: str):
+    letters = [char for char in text]
+    new = []
+    for char in letters:
+        if char not in list(string.punctuation+'£¢©¥≤ϵ≥™≠ꓯ÷®₦№℗'):
+            new.append(char)
+        else:
+            new.extend([' ',char,' '])
+    tokens = reduce(lambda x,y:x+y, new)
+    for i in tokens.split(' ')[:-1]:
+        yield(i)
+
+
+def run(sizes=(1_000, 4_000, 16_000, 64_000, 256_000), legacy_limit=16_000, number=3):
+    assert list(legacy_tokenize(PARITY)) == list(tokenize(PARITY))
+    print(f'{"CHARS":>8} {"NEW (ms)":>10} {"NEW ns/char":>12} {"OLD (ms)":>10} {"OLD ns/char":>12}')
+    for size in sizes:
+        text = (SENTENCE * (size // len(SENTENCE) + 1))[:size]
+        new = timeit(lambda: list(tokenize(text)), number=number) / number
+        row = f'{size:>8} {new * 1e3:>10.2f} {new * 1e9 / size:>12.1f}'
+        if size <= legacy_limit:
+            assert list(legacy_tokenize(text)) == list(tokenize(text))
+            old = timeit(lambda: list(legacy_tokenize(text)), number=number) / number
+            row += f' {old * 1e3:>10.2f} {old * 1e9 / size:>12.1f}'
+        print(row)
+    sentences = [SENTENCE] * 10_000
+    batch = timeit(lambda: tokenize_batch(sentences), number=number) / number
+    print(f'BATCH: {len(sentences)} SENTENCES IN {batch * 1e3:.2f} ms')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,106 @@
+import random
+import sys
+
+# a small Yorùbá lexicon, enough to give sentences the shape of real ones: tone marks and underdots throughout,
+# short function words, and punctuation the tokenizer has to split off
+WORDS = {
+    'NOUN': ['ilé', 'ọmọ', 'ìwé', 'owó', 'oúnjẹ', 'ọjà', 'omi', 'ènìyàn', 'ayé', 'ọ̀rọ̀', 'iṣẹ́', 'ìlú', 'bàbá',
+             'màmá', 'ọkọ̀', 'ẹ̀kọ́', 'àwòrán', 'oògùn', 'aṣọ', 'ọjọ́', 'olùkọ́', 'akẹ́kọ̀ọ́', 'ọ̀rẹ́', 'ẹbí'],
+    'PROPN': ['Ọlájídé', 'Kọ́láwọlé', 'Ìbàdàn', 'Èkó', 'Àdìó'],
+    'VERB': ['lọ', 'wá', 'jẹ', 'rí', 'ṣe', 'sọ', 'ra', 'kọ́', 'mọ̀', 'fẹ́', 'dé', 'gbọ́', 'mu', 'kà', 'fún', 'tà'],
+    'PRON': ['mo', 'ó', 'a', 'wọ́n', 'o', 'ẹ'],
+    'AUX': ['ń', 'yóò', 'ti', 'máa', 'kò'],
+    'ADP': ['sí', 'ní', 'láti', 'nínú', 'lórí'],
+    'ADJ': ['dára', 'púpọ̀', 'tuntun', 'kékeré', 'ńlá', 'dúdú'],
+    'ADV': ['gan', 'tún', 'ṣì', 'lánàá', 'lọ́la'],
+    'NUM': ['méjì', 'mẹ́ta', 'ọ̀kan', 'mẹ́rin'],
+    'CCONJ': ['àti', 'sì', 'ṣùgbọ́n'],
+}
+POSSESSIVES = ['mi', 'rẹ̀', 'wa', 'wọn']
+FEATS = {'NUM': 'NumType=Card', 'PRON': 'PronType=Prs'}
+SIZES = (1_000, 10_000, 100_000)
+
+
+class Builder:
+    '''Grows one sentence as parallel lists, attaching every word to a head as it goes, so trees stay projective.'''
+
+    def __init__(self, rng):
+        self.rng, self.forms, self.upos, self.heads, self.deprels = rng, [], [], [], []
+
+    def word(self, upos, head, deprel, form=None):
+        self.forms.append(form or self.rng.choice(WORDS[upos]))
+        self.upos.append(upos)
+        self.heads.append(head)
+        self.deprels.append(deprel)
+        return len(self.forms)
+
+    def nominal(self, head, deprel):
+        '''A noun phrase attached to `head`; returns the noun's ID.'''
+        rng = self.rng
+        if rng.random() < 0.3:
+            return self.word(rng.choice(('PRON', 'PROPN')), head, deprel)
+        noun = self.word('NOUN', head, deprel)
+        if rng.random() < 0.3:
+            self.word('ADJ', noun, 'amod')
+        if rng.random() < 0.15:
+            self.word('NUM', noun, 'nummod')
+        if rng.random() < 0.4:
+            self.word('PRON', noun, 'nmod:poss', rng.choice(POSSESSIVES))
+        return noun
+
+    def clause(self, root):
+        '''A subject-verb-object clause, possibly with an oblique; its verb heads to `root` (0 for the main clause).'''
+        rng, start = self.rng, len(self.forms)
+        subject = self.nominal(None, 'nsubj')
+        auxiliaries = [self.word('AUX', None, 'aux') for _ in range(rng.random() < 0.4)]
+        verb = self.word('VERB', root, 'ROOT' if root == 0 else 'conj')
+        for id in [subject] + auxiliaries:
+            self.heads[id - 1] = verb
+        self.nominal(verb, 'obj')
+        if rng.random() < 0.5:
+            case = self.word('ADP', None, 'case')
+            self.heads[case - 1] = self.nominal(verb, 'obl')
+        if rng.random() < 0.3:
+            self.word('ADV', verb, 'advmod')
+        return verb, start
+
+    def sentence(self, target):
+        main, _ = self.clause(0)
+        while len(self.forms) < target - 2:
+            conjunction = self.word('CCONJ', None, 'cc')
+            verb, _ = self.clause(main)
+            self.heads[conjunction - 1] = verb
+            if self.rng.random() < 0.3 and len(self.forms) < target - 2:
+                self.word('PUNCT', main, 'punct', ',')
+        self.word('PUNCT', main, 'punct', self.rng.choice('..?!'))
+        return self
+
+
+def sentences(tokens: int, seed: int = 1):
+    '''Yields (text, forms, upos, heads, deprels) until at least `tokens` tokens were produced. Lengths follow a
+    log-normal around 15 tokens, like the Yorùbá UD treebank.'''
+    rng, produced = random.Random(seed), 0
+    while produced < tokens:
+        target = min(max(int(rng.lognormvariate(2.6, 0.5)), 4), 60)
+        sentence = Builder(rng).sentence(target)
+        produced += len(sentence.forms)
+        yield ' '.join(sentence.forms), sentence.forms, sentence.upos, sentence.heads, sentence.deprels
+
+
+def conllu(tokens: int, seed: int = 1, annotator: str = 'BENCHMARK'):
+    '''A synthetic treebank of at least `tokens` tokens as CoNLL-U text.'''
+    blocks = []
+    for number, (text, forms, upos, heads, deprels) in enumerate(sentences(tokens, seed), 1):
+        lines = [f'# sent_id = bench-{number}', f'# ANNOTATOR = {annotator}', f'# Text = {text}', '# Ref = SYNTHETIC']
+        lines.extend(f'{id}\t{form}\t{form.lower()}\t{tag}\t_\t{FEATS.get(tag, "_")}\t{head}\t{deprel}\t_\t_'
+                     for id, (form, tag, head, deprel) in enumerate(zip(forms, upos, heads, deprels), 1))
+        blocks.append('\n'.join(lines) + '\n\n')
+    return ''.join(blocks)
+
+
+def raw_text(tokens: int, seed: int = 1):
+    return [text for text, *_ in sentences(tokens, seed)]
+
+
+if __name__ == '__main__':
+    sys.stdout.write(conllu(int(sys.argv[1]) if len(sys.argv) > 1 else SIZES[0]))
@@ -0,0 +1,247 @@
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+from time import perf_counter
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from bulk import parse_file
+from core import serialize
+from corpus import Corpus, iter_blocks
+from stats import Columns, describe
+from store import Store
+from tokenizer import get_tokenizer
+from tokenstore import Token, TokenStore
+
+from corpora import SIZES, conllu
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+RERUNS = 20
+# whole-corpus cases work through the corpus in this many slices, so each run gives enough samples for --check
+SLICES = 20
+# tagging one sentence costs the same whatever the corpus size, so big corpora only cycle through this many
+TAG_SENTENCES = 500
+# --check only compares the timings of cases with at least this many samples, or whose operations take at least
+# LONG_MS: a few short timings are mostly scheduler noise
+MIN_SAMPLES = 50
+LONG_MS = 20.0
+# added to every timing limit, as 1 MiB is to memory: a slice of a small corpus takes microseconds, and a relative
+# limit alone would fail on timer and cache jitter
+SLACK_MS = 0.05
+# cases spending their time in memcpy, SQLite I/O or Streamlit's runtime rather than in Python bytecode; the
+# calibration loop says nothing about their speed, so their timings are compared unscaled
+UNSCALED = frozenset({'download_build', 'store_load', 'rerun'})
+
+
+class Data:
+    '''One corpus in every shape the cases need, built before anything is timed.'''
+
+    def __init__(self, text: str):
+        self.text = text
+        self.bytes = text.encode('utf-8')
+        self.blocks = [block + '\n\n' for _, block in iter_blocks(io.StringIO(text))]
+        self.sentences = []
+        for block in self.blocks:
+            lines = block.strip('\n').split('\n')
+            raw = next(line.split('=', 1)[1].strip() for line in lines if line.startswith('# Text') or line.startswith('# text'))
+            rows = [line.split('\t') for line in lines if not line.startswith('#')]
+            self.sentences.append((raw, [Token(*row) for row in rows if row[0].isdigit()]))
+        self.tokens = sum(len(tokens) for _, tokens in self.sentences)
+
+    @classmethod
+    def sized(cls, tokens: int, source: str = None):
+        '''Synthetic data, or the first sentences of a real treebank, totalling at least `tokens` tokens.'''
+        if source is None:
+            return cls(conllu(tokens))
+        with open(source, encoding='utf-8') as stream:
+            blocks, count = [], 0
+            for _, block in iter_blocks(stream):
+                blocks.append(block + '\n\n')
+                count += sum(1 for line in block.split('\n') if line.split('\t', 1)[0].isdigit())
+                if count >= tokens:
+                    break
+        return cls(''.join(blocks))
+
+
+# every case takes a Data and returns (operations, items): operations are timed one by one for the latency
+# percentiles, and items (usually tokens) over the total time give the throughput
+
+def tokenize(data):
+    tokenizer = get_tokenizer()
+    return [lambda raw=raw: tokenizer.tokenize(raw) for raw, _ in data.sentences], data.tokens
+
+
+def tag_cycle(data):
+    '''What tagging a sentence costs: a TAG per token in random order, the table shown, then an UPDATE.'''
+    rng = random.Random(1)
+    def cycle(tokens):
+        store = TokenStore()
+        for token in rng.sample(tokens, len(tokens)):
+            store.add(token)
+        TokenStore.from_frame(store.to_frame())
+    sentences = [tokens for _, tokens in data.sentences[:TAG_SENTENCES]]
+    return [lambda tokens=tokens: cycle(tokens) for tokens in sentences], sum(map(len, sentences))
+
+
+def serialization(data):
+    return [lambda raw=raw, tokens=tokens: serialize(tokens, raw, 'BENCHMARK', 'SYNTHETIC') for raw, tokens in data.sentences], data.tokens
+
+
+def convert(data):
+    corpus = Corpus()
+    return [lambda block=block: corpus.add(block) for block in data.blocks], data.tokens
+
+
+def upload_parse(data):
+    return [lambda: parse_file('bench.conllu', data.bytes)], data.tokens
+
+
+def slices(blocks, count: int = SLICES):
+    '''`blocks` cut into `count` contiguous runs of about the same length, or one per block if there are fewer.'''
+    count = min(count, len(blocks))
+    return [blocks[len(blocks) * i // count:len(blocks) * (i + 1) // count] for i in range(count)]
+
+
+def download_build(data):
+    corpora = []
+    for blocks in slices(data.blocks):
+        corpora.append(Corpus())
+        corpora[-1].extend(io.StringIO(''.join(blocks)))
+    return [corpus.to_bytes for corpus in corpora], data.tokens
+
+
+def statistics(data):
+    return [lambda blocks=blocks: describe(Columns.from_blocks(blocks)) for blocks in slices(data.blocks)], data.tokens
+
+
+def store_load(data):
+    '''Slices added one after another to one new treebank, as a bulk load does batch by batch.'''
+    store = Store(os.path.join(tempfile.mkdtemp(), 'bench.sqlite3'))
+    return [lambda blocks=blocks: store.add_many(blocks) for blocks in slices(data.blocks)], data.tokens
+
+
+def rerun(data):
+    '''Full AppTest reruns of the ANNOTATE page with the corpus already converted and a sentence being tagged.'''
+    from streamlit.testing.v1 import AppTest
+    app = AppTest.from_file(os.path.join(ROOT, 'YORDEPAN.py'), default_timeout=120)
+    app.run()
+    app.sidebar.selectbox[0].select('ANNOTATE').run()
+    raw, tokens = data.sentences[0]
+    app.text_area[0].input(raw).run()
+    corpus = Corpus()
+    corpus.extend(io.StringIO(data.text))
+    app.session_state.CONLLU = corpus
+    app.session_state.DATA = TokenStore(tokens[:-1])
+    app.run()
+    def once():
+        app.run()
+        assert not app.exception, app.exception
+    return [once] * RERUNS, RERUNS
+
+
+CASES = {case.__name__: case for case in (tokenize, tag_cycle, serialization, convert, upload_parse, download_build,
+                                           statistics, store_load, rerun)}
+
+
+def calibrate(rounds: int = 40):
+    '''Milliseconds for a fixed pure-Python loop of 300,000 steps, so baselines from another machine can be scaled.
+    Many short rounds are timed and the fastest kept, which shrugs off most preemptions.'''
+    times = []
+    for _ in range(rounds):
+        start = perf_counter()
+        sum(i * i for i in range(50_000))
+        times.append(perf_counter() - start)
+    return min(times) * 6e3
+
+
+def measure(case, data, repeat: int):
+    samples, total = [], 0.0
+    for _ in range(repeat):
+        operations, items = case(data)
+        for operation in operations:
+            start = perf_counter()
+            operation()
+            samples.append(perf_counter() - start)
+        total += sum(samples[-len(operations):])
+    tracemalloc.start()
+    operations, _ = case(data)
+    base = tracemalloc.get_traced_memory()[0]
+    for operation in operations:
+        operation()
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    samples = np.array(samples) * 1e3
+    return {'operations': len(operations), 'items': items, 'samples': len(samples), 'seconds': total / repeat,
+            'items_per_s': items * repeat / total if total else float('inf'),
+            'p50_ms': float(np.percentile(samples, 50)), 'p95_ms': float(np.percentile(samples, 95)),
+            'p99_ms': float(np.percentile(samples, 99)), 'peak_mib': peak / (1 << 20)}
+
+
+def compare(results, baseline, tolerance: float, memory_tolerance: float):
+    '''Regressions against a stored baseline. CPU-bound timings are scaled when this machine is slower than the
+    baseline's; a faster reading never tightens the limits, as calibration noise would then fail unchanged code.'''
+    slower = max(results['calibration_ms'] / baseline['calibration_ms'], 1.0)
+    failures = []
+    for key, result in results['results'].items():
+        expected = baseline['results'].get(key)
+        if expected is None:
+            continue
+        scale = 1.0 if key.split('@')[0] in UNSCALED else slower
+        limits = {'peak_mib': expected['peak_mib'] * (1 + memory_tolerance) + 1}
+        samples = expected.get('samples', 0)
+        if samples >= MIN_SAMPLES or expected['p50_ms'] >= LONG_MS:
+            limits['p50_ms'] = expected['p50_ms'] * scale * (1 + tolerance) + SLACK_MS
+        if samples >= MIN_SAMPLES:
+            limits['p95_ms'] = expected['p95_ms'] * scale * (1 + tolerance) + SLACK_MS
+        for metric, allowed in limits.items():
+            if result[metric] > allowed:
+                failures.append(f'{key} {metric}: {result[metric]:.3f} > {allowed:.3f} (baseline {expected[metric]:.3f})')
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='BENCHMARK THE ANNOTATION AND CORPUS HOT PATHS.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES), help='corpus sizes in tokens')
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--repeat', type=int, default=3, help='times each case runs over its corpus')
+    parser.add_argument('--corpus', default=None, help='real CoNLL-U treebank to slice instead of synthetic data')
+    parser.add_argument('--save', nargs='?', const=BASELINE, default=None, help='write the results as the new baseline')
+    parser.add_argument('--check', nargs='?', const=BASELINE, default=None, help='exit 1 if slower or bigger than this baseline')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='allowed slowdown, as a fraction of the baseline')
+    parser.add_argument('--memory-tolerance', type=float, default=0.25, help='allowed peak memory growth, as a fraction')
+    args = parser.parse_args(argv)
+
+    # the app writes its journal, lexicon and log to the working directory
+    os.chdir(tempfile.mkdtemp())
+    results = {'calibration_ms': calibrate(), 'results': {}}
+    print(f'CALIBRATION: {results["calibration_ms"]:.2f} ms')
+    print(f'{"CASE":<16} {"TOKENS":>7} {"OPS":>6} {"SECONDS":>8} {"ITEMS/S":>11} {"P50 ms":>9} {"P95 ms":>9} {"P99 ms":>9} {"PEAK MiB":>9}')
+    for size in args.sizes:
+        data = Data.sized(size, args.corpus)
+        for name in args.cases:
+            result = results['results'][f'{name}@{size}'] = measure(CASES[name], data, args.repeat)
+            print(f'{name:<16} {data.tokens:>7} {result["operations"]:>6} {result["seconds"]:>8.3f} {result["items_per_s"]:>11.0f} '
+                  f'{result["p50_ms"]:>9.3f} {result["p95_ms"]:>9.3f} {result["p99_ms"]:>9.3f} {result["peak_mib"]:>9.2f}', flush=True)
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=1, sort_keys=True)
+        print(f'BASELINE WRITTEN TO {args.save}')
+    if args.check:
+        with open(args.check, encoding='utf-8') as file:
+            failures = compare(results, json.load(file), args.tolerance, args.memory_tolerance)
+        for failure in failures:
+            print(f'REGRESSION: {failure}')
+        print(f'{len(failures)} REGRESSION(S) AGAINST {args.check}')
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+import hashlib
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import NamedTuple
+
+from corpus import iter_sentences
+from validate import check_sentence
+
+_POOL = None
+
+
+class FileReport(NamedTuple):
+    name: str
+    digest: str
+    sentences: list
+    errors: list
+    issues: list = []
+    skipped: bool = False
+
+
+def digest(data: bytes):
+    return hashlib.sha256(data).hexdigest()
+
+
+def parse_file(name: str, data: bytes):
+    '''Parses and validates one sentence at a time, so a malformed sentence costs only itself and is reported with its line number.'''
+    sentences, errors, issues = [], [], []
+    stream = io.TextIOWrapper(io.BytesIO(data), encoding='utf-8', errors='strict')
+    try:
+        for line, sentence, error in iter_sentences(stream):
+            if error is None:
+                sentences.append(sentence)
+                issues.extend(check_sentence(sentence, line))
+            else:
+                errors.append((line, error))
+    except UnicodeDecodeError as error:
+        errors.append((0, f'NOT UTF-8: {error}'))
+    return FileReport(name, digest(data), sentences, errors, issues)
+
+
+def _pool():
+    global _POOL
+    if _POOL is None:
+        _POOL = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context('spawn'))
+    return _POOL
+
+
+def import_files(files, corpus, progress=None):
+    '''Parses (name, bytes) pairs in a process pool and appends their valid sentences to `corpus` in upload order.
+    Files whose content hash is already in the corpus are skipped. `progress(done, total, report)` is called per file.'''
+    files = list(files)
+    reports, pending, seen = [None] * len(files), {}, set(corpus.digests)
+    for index, (name, data) in enumerate(files):
+        key = digest(data)
+        if key in seen:
+            reports[index] = FileReport(name, key, [], [], skipped=True)
+        elif len(files) == 1:
+            reports[index] = parse_file(name, data)
+        else:
+            pending[_pool().submit(parse_file, name, data)] = index
+        seen.add(key)
+
+    done, appended = 0, 0
+    for report in reports:
+        if report is not None:
+            done += 1
+            if progress:
+                progress(done, len(files), report)
+    for future in as_completed(pending):
+        reports[pending[future]] = future.result()
+        done += 1
+        if progress:
+            progress(done, len(files), reports[pending[future]])
+        while appended < len(reports) and reports[appended] is not None:
+            _commit(reports[appended], corpus)
+            appended += 1
+    while appended < len(reports):
+        _commit(reports[appended], corpus)
+        appended += 1
+    return reports
+
+
+def _commit(report, corpus):
+    if report.skipped:
+        return
+    for sentence in report.sentences:
+        corpus.append(sentence)
+    corpus.digests.add(report.digest)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the modules live at the top of the repository, next to this file
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -0,0 +1,123 @@
+import argparse
+import sys
+from itertools import islice
+from pathlib import Path
+
+from corpus import iter_blocks
+from tokenizer import get_tokenizer
+from tokenstore import Token, TokenStore
+
+BATCH_SIZE = 1000
+
+
+def tokenize(text: str, language: str = 'default'):
+    return get_tokenizer(language).tokenize(text)
+
+
+def build_sentence(text: str, language: str = 'default'):
+    '''A TokenStore with every token's ID and FORM filled in and everything else left as `_`.'''
+    return TokenStore(Token(id, form) for id, form in enumerate(tokenize(text, language), 1))
+
+
+def serialize(tokens, text: str, annotator: str = 'ANONYMOUS', source: str = 'OTHER', sent_id: str = None):
+    lines = [f'# sent_id = {sent_id}'] if sent_id is not None else []
+    if annotator is not None:
+        lines.append(f'# ANNOTATOR = {annotator}')
+    lines.append(f'# Text = {text}')
+    if source is not None:
+        lines.append(f'# Ref = {source}')
+    for i in tokens:
+        lines.append(f'{i.ID}\t{i.FORM}\t{i.LEMMA}\t{i.UPOS}\t{i.XPOS}\t{i.FEATS}\t{"_" if i.HEAD is None else i.HEAD}\t{i.DEPREL}\t{i.DEPS}\t{i.MISC}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def convert(lines, out, language: str = 'default', prefix: str = 's', source: str = None):
+    '''Writes one skeleton sentence per non-blank input line, BATCH_SIZE lines at a time. Returns the number written.'''
+    tokenizer, count = get_tokenizer(language), 0
+    # runs of whitespace, tabs included, become one space so # Text matches the tokens and rows keep 10 columns
+    lines = (' '.join(line.split()) for line in lines)
+    lines = (line for line in lines if line)
+    while batch := list(islice(lines, BATCH_SIZE)):
+        for text, tokens in zip(batch, tokenizer.tokenize_batch(batch)):
+            count += 1
+            skeleton = (Token(id, form) for id, form in enumerate(tokens, 1))
+            out.write(serialize(skeleton, text, annotator=None, source=source, sent_id=f'{prefix}{count}'))
+    return count
+
+
+def _sent_id(block: str):
+    for line in block.split('\n'):
+        if not line.startswith('#'):
+            break
+        if line.startswith('# sent_id'):
+            return line.split('=', 1)[1].strip()
+    return None
+
+
+def merge(streams, out):
+    '''Copies CoNLL-U blocks from every stream into `out`, dropping sentences whose sent_id was already written.
+    Returns (written, skipped).'''
+    seen, written, skipped = set(), 0, 0
+    for stream in streams:
+        for _, block in iter_blocks(stream):
+            sent_id = _sent_id(block)
+            if sent_id is not None:
+                if sent_id in seen:
+                    skipped += 1
+                    continue
+                seen.add(sent_id)
+            out.write(block + '\n\n')
+            written += 1
+    return written, skipped
+
+
+def _open(path: str, mode: str):
+    if path == '-':
+        return sys.stdin if 'r' in mode else sys.stdout
+    return open(path, mode, encoding='utf-8')
+
+
+def _streams(paths):
+    for path in paths:
+        stream = _open(path, 'r')
+        try:
+            yield stream
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='PREPARE CONLL-U FILES WITHOUT THE WEBAPP.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    skeleton = commands.add_parser('convert', help='turn raw text (one sentence per line) into skeleton CoNLL-U')
+    skeleton.add_argument('input', help='raw text file, or - for stdin')
+    skeleton.add_argument('-o', '--output', default='-', help='CoNLL-U file to write, or - for stdout')
+    skeleton.add_argument('--language', default='default', help='tokenizer rules to use')
+    skeleton.add_argument('--prefix', default=None, help='sent_id prefix (defaults to the input file name)')
+    skeleton.add_argument('--source', default=None, help='value for the # Ref comment')
+
+    combine = commands.add_parser('merge', help='merge CoNLL-U files, dropping repeated sent_ids')
+    combine.add_argument('inputs', nargs='+', help='CoNLL-U files to merge')
+    combine.add_argument('-o', '--output', default='-', help='CoNLL-U file to write, or - for stdout')
+
+    args = parser.parse_args(argv)
+    out = _open(args.output, 'w')
+    try:
+        if args.command == 'convert':
+            prefix = args.prefix if args.prefix is not None else ('stdin' if args.input == '-' else Path(args.input).stem) + '-'
+            for stream in _streams([args.input]):
+                count = convert(stream, out, args.language, prefix, args.source)
+            print(f'{count} SENTENCE(S) WRITTEN', file=sys.stderr)
+        else:
+            written, skipped = merge(_streams(args.inputs), out)
+            print(f'{written} SENTENCE(S) WRITTEN, {skipped} DUPLICATE(S) SKIPPED', file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,258 @@
+import hashlib
+import io
+import threading
+from bisect import insort
+from collections import defaultdict
+from tempfile import SpooledTemporaryFile
+
+from conllu import parse, parse_incr
+from conllu.exceptions import ParseException
+from conllu.parser import DEFAULT_FIELD_PARSERS, DEFAULT_FIELDS, parse_line, parse_token_and_metadata
+
+ANNOTATOR = 'ANNOTATOR'
+SOURCE = 'Ref'
+CHUNK_SIZE = 1 << 16
+
+
+class Corpus:
+    '''Serialized sentences live in one spooled file; only byte offsets and a metadata index stay in memory.
+    The spool is append-only: a replaced sentence is written at the end and its old bytes are never reclaimed, so
+    every edit grows the spool by one sentence for the life of the Corpus. Readers on other threads can keep using
+    the offsets they copied because nothing is ever moved.'''
+
+    def __init__(self, max_size: int = 8 << 20):
+        self._spool = SpooledTemporaryFile(max_size=max_size, mode='w+b')
+        # serialization may read the spool from a worker thread while the script thread appends to it
+        self._lock = threading.Lock()
+        self._offsets = []
+        self._end = 0
+        self._live = 0
+        self._hash = hashlib.sha256()
+        self._rows = []
+        self._sent_ids = {}
+        self._annotators = defaultdict(list)
+        self._sources = defaultdict(list)
+        self.digests = set()
+        self.version = 0
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __iter__(self):
+        for index in range(len(self._offsets)):
+            yield self[index]
+
+    def __getitem__(self, index: int):
+        return parse(self.raw(index).decode('utf-8'))[0]
+
+    @property
+    def size(self):
+        '''Bytes of serialized sentences, not counting replaced ones.'''
+        return self._live
+
+    def content_hash(self):
+        '''sha256 over every sentence written so far, kept up to date as sentences are appended or replaced.'''
+        with self._lock:
+            return self._hash.copy().hexdigest()
+
+    def raw(self, index: int):
+        start, end = self._offsets[index]
+        with self._lock:
+            self._spool.seek(start)
+            return self._spool.read(end - start)
+
+    def _write(self, data: bytes, index: int = None):
+        '''Appends `data` to the spool as sentence `index` (a new sentence when None) and returns the index.'''
+        with self._lock:
+            start = self._end
+            self._spool.seek(start)
+            self._spool.write(data)
+            self._end += len(data)
+            if index is None:
+                index = len(self._offsets)
+                self._offsets.append((start, self._end))
+            else:
+                self._live -= self._offsets[index][1] - self._offsets[index][0]
+                self._offsets[index] = (start, self._end)
+                self._hash.update(f'{index}:'.encode('utf-8'))
+            self._live += len(data)
+            self._hash.update(data)
+            self.version += 1
+        return index
+
+    def _index(self, index: int, metadata):
+        row = (metadata.get('sent_id'), metadata.get(ANNOTATOR, 'ANONYMOUS'), metadata.get(SOURCE, 'OTHER'),
+               metadata.get('Text', metadata.get('text', '')))
+        if index == len(self._rows):
+            self._rows.append(row)
+        else:
+            sent_id, annotator, source, _ = self._rows[index]
+            if self._sent_ids.get(sent_id) == index:
+                del self._sent_ids[sent_id]
+            for lists, key in ((self._annotators, annotator), (self._sources, source)):
+                lists[key].remove(index)
+                if not lists[key]:
+                    del lists[key]
+            self._rows[index] = row
+        sent_id, annotator, source, _ = row
+        if sent_id is not None:
+            self._sent_ids[sent_id] = index
+        insort(self._annotators[annotator], index)
+        insort(self._sources[source], index)
+
+    def append(self, sentence):
+        index = self._write(sentence.serialize().encode('utf-8'))
+        self._index(index, sentence.metadata)
+        return index
+
+    def add(self, text: str):
+        '''Validates and appends the one sentence in `text`.'''
+        return self.append(parse_sentence(text))
+
+    def replace(self, index: int, text: str):
+        '''Validates the one sentence in `text` and puts it in place of sentence `index`, leaving the rest untouched.
+        The old version stays in the spool as dead bytes.'''
+        sentence = parse_sentence(text)
+        self._write(sentence.serialize().encode('utf-8'), index)
+        self._index(index, sentence.metadata)
+        return index
+
+    def extend(self, stream):
+        '''Parses a text stream and appends its sentences. Nothing is appended if any sentence is malformed.'''
+        sentences = list(parse_incr(stream))
+        for sentence in sentences:
+            self.append(sentence)
+        return len(sentences)
+
+    def find(self, sent_id: str):
+        index = self._sent_ids.get(sent_id)
+        return None if index is None else self[index]
+
+    def by_annotator(self, annotator: str):
+        return list(self._annotators.get(annotator, ()))
+
+    def by_source(self, source: str):
+        return list(self._sources.get(source, ()))
+
+    def row(self, index: int):
+        '''(sent_id, annotator, source, text) of sentence `index`, from the index alone.'''
+        return self._rows[index]
+
+    def search(self, text: str = '', sent_id: str = '', annotator: str = None):
+        '''Indices of the sentences whose text and sent_id contain `text` and `sent_id` (ignoring case),
+        only among `annotator`'s sentences if one is given.'''
+        candidates = self._annotators.get(annotator, ()) if annotator is not None else range(len(self._rows))
+        text, sent_id = text.lower(), sent_id.lower()
+        if not (text or sent_id):
+            return list(candidates)
+        rows = self._rows
+        return [i for i in candidates if text in rows[i][3].lower() and sent_id in (rows[i][0] or '').lower()]
+
+    def annotators(self):
+        return list(self._annotators)
+
+    def sources(self):
+        return list(self._sources)
+
+    def _ranges(self, count: int):
+        '''Spool ranges holding the first `count` sentences in order; neighbours in the spool are merged into one range.'''
+        with self._lock:
+            offsets = self._offsets[:count]
+        first = last = None
+        for start, end in offsets:
+            if start != last:
+                if first is not None:
+                    yield first, last
+                first = start
+            last = end
+        if first is not None:
+            yield first, last
+
+    def iter_chunks(self, chunk_size: int = CHUNK_SIZE, count: int = None):
+        '''The first `count` sentences (all of them by default), serialized, in chunks of at most `chunk_size` bytes.'''
+        for position, end in self._ranges(len(self) if count is None else count):
+            while position < end:
+                with self._lock:
+                    self._spool.seek(position)
+                    chunk = self._spool.read(min(chunk_size, end - position))
+                position += len(chunk)
+                yield chunk
+
+    def tail(self, count: int):
+        '''The serialized text of the last `count` sentences.'''
+        return b''.join(self.raw(index) for index in range(max(len(self) - count, 0), len(self))).decode('utf-8')
+
+    def to_bytes(self):
+        buffer = io.BytesIO()
+        for chunk in self.iter_chunks():
+            buffer.write(chunk)
+        return buffer.getvalue()
+
+
+def parse_sentence(text: str):
+    '''The one sentence in `text`; ParseException if there is none or more than one.'''
+    for _, message in _bad_rows(text, len(DEFAULT_FIELDS)):
+        raise ParseException(message)
+    sentences = parse(text)
+    if len(sentences) != 1 or not sentences[0]:
+        raise ParseException(f'Expected exactly one sentence, found {len(sentences)}')
+    return sentences[0]
+
+
+def iter_blocks(stream):
+    '''Yields (first line number, block text) for every blank-line separated block, one line at a time.'''
+    lines, start = [], 0
+    for number, line in enumerate(stream, 1):
+        line = line.rstrip('\r\n')
+        if line.strip():
+            if not lines:
+                start = number
+            lines.append(line)
+        elif lines:
+            yield start, '\n'.join(lines)
+            lines = []
+    if lines:
+        yield start, '\n'.join(lines)
+
+
+def _bad_rows(block: str, width: int):
+    '''(offset, message) for every token line of `block` without exactly `width` tab-separated fields. The conllu
+    parser would accept them and leave the missing fields out.'''
+    for offset, line in enumerate(block.strip('\n').split('\n')):
+        if line.startswith('#') or not line.strip():
+            continue
+        found = line.count('\t') + 1
+        if found != width:
+            yield offset, f'EXPECTED {width} TAB-SEPARATED FIELDS, FOUND {found}: {line!r}'
+
+
+def _error_line(start: int, block: str, fields, field_parsers=None):
+    field_parsers = {**DEFAULT_FIELD_PARSERS, **(field_parsers or {})}
+    for offset, line in enumerate(block.split('\n')):
+        if line.startswith('#'):
+            continue
+        try:
+            parse_line(line, fields, field_parsers)
+        except Exception:
+            return start + offset
+    return start
+
+
+def iter_sentences(stream, field_parsers=None):
+    '''Yields (first line number, sentence, error) per block; exactly one of sentence and error is None.'''
+    fields = [field.lower() for field in DEFAULT_FIELDS]
+    for start, block in iter_blocks(stream):
+        for line in block.split('\n'):
+            if line.startswith('# global.columns = '):
+                fields = [field.lower() for field in line.split('=', 1)[1].split()]
+        bad = next(_bad_rows(block, len(fields)), None)
+        if bad is not None:
+            yield start + bad[0], None, bad[1]
+            continue
+        try:
+            sentence = parse_token_and_metadata(block, fields=fields, field_parsers=field_parsers)
+        except Exception as error:
+            yield _error_line(start, block, fields, field_parsers), None, str(error)
+            continue
+        if sentence:
+            yield start, sentence, None
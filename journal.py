@@ -0,0 +1,238 @@
+import json
+import os
+import re
+import secrets
+import shutil
+import threading
+import time
+
+SYNC_EVERY = 32
+SYNC_INTERVAL = 1.0
+COMPACT_EVERY = 1000
+# sentences per record when a compaction folds them together
+CHUNK = 1000
+TOKEN = re.compile(r'[A-Za-z0-9_-]{8,64}')
+
+
+def new_token():
+    return secrets.token_urlsafe(12)
+
+
+def valid_token(token):
+    return isinstance(token, str) and TOKEN.fullmatch(token) is not None
+
+
+def _path(directory: str, token: str):
+    return os.path.join(directory, f'{token}.jsonl')
+
+
+def exists(directory: str, token):
+    '''Whether a non-empty journal is saved under `token`. Looks before any Journal is made, so probing a token
+    creates nothing.'''
+    if not valid_token(token):
+        return False
+    try:
+        return os.path.getsize(_path(directory, token)) > 0
+    except OSError:
+        return False
+
+
+def _encode(records):
+    return b''.join(json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+                    for record in records)
+
+
+class Session:
+    '''What a journal replays to: the annotator, the sentence being tagged and every converted sentence.'''
+    __slots__ = ('user', 'source', 'text', 'data', 'sentences', 'digests')
+
+    def __init__(self):
+        self.user = None
+        self.source = None
+        self.text = None
+        self.data = None
+        self.sentences = []
+        self.digests = set()
+
+    def apply(self, record):
+        op = record.get('op')
+        if op == 'session':
+            self.user, self.source = record.get('user'), record.get('source')
+        elif op == 'tag':
+            self.text, self.data = record.get('text'), self.data or {}
+            self.data[record['token'][0]] = record['token']
+        elif op == 'update':
+            self.text, self.data = record.get('text'), {token[0]: token for token in record['tokens']}
+        elif op == 'clear':
+            self.text = self.data = None
+        elif op == 'convert':
+            self.sentences.append(record['sentence'])
+            self.text = self.data = None
+        elif op == 'edit':
+            if 0 <= record['index'] < len(self.sentences):
+                self.sentences[record['index']] = record['sentence']
+        elif op == 'import':
+            self.sentences.extend(record['sentences'])
+            self.digests.update(record.get('digests', ()))
+
+    def records(self):
+        '''The shortest journal that replays to this session.'''
+        records = [{'op': 'session', 'user': self.user, 'source': self.source}]
+        if self.digests:
+            records.append({'op': 'import', 'sentences': [], 'digests': sorted(self.digests)})
+        for start in range(0, len(self.sentences), CHUNK):
+            records.append({'op': 'import', 'sentences': self.sentences[start:start + CHUNK]})
+        if self.data is not None:
+            records.append({'op': 'update', 'text': self.text, 'tokens': sorted(self.data.values())})
+        return records
+
+
+def _lines(file, end):
+    while file.tell() < end and (line := file.readline()):
+        yield line
+
+
+def replay(lines):
+    session = Session()
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            # only the tail of a journal can be torn, and Journal trims it before appending again
+            continue
+        session.apply(record)
+    return session
+
+
+class Journal:
+    '''Append-only JSONL log of one annotation session, named by its token.
+    Every action is one flushed line, so a crashed process loses nothing; fsync is batched to every SYNC_EVERY
+    records or SYNC_INTERVAL seconds, which bounds what a power cut can lose.
+    The file is only created by the first record, and is closed again once a sync finds the session idle.'''
+
+    def __init__(self, directory: str, token: str):
+        if not valid_token(token):
+            raise ValueError(f'Invalid session token: {token!r}')
+        self.directory = directory
+        self.token = token
+        self.path = _path(directory, token)
+        self._trim()
+        self._file = None
+        self._lock = threading.Lock()
+        self._timer = None
+        self._pending = 0
+        self._synced = time.monotonic()
+        self._appended = 0
+        self._live = 0
+        self._compacting = False
+
+    def _trim(self):
+        '''Drops a record left half-written by a crash so the next append starts on a fresh line.'''
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r+b') as file:
+            end = file.seek(0, os.SEEK_END)
+            if not end:
+                return
+            file.seek(max(end - (1 << 16), 0))
+            tail = file.read()
+            if tail.endswith(b'\n'):
+                return
+            cut = tail.rfind(b'\n')
+            file.truncate(end - len(tail) + cut + 1 if cut >= 0 else 0)
+
+    def exists(self):
+        return exists(self.directory, self.token)
+
+    def _open(self):
+        if self._file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._file = open(self.path, 'ab')
+        return self._file
+
+    def record(self, op: str, **payload):
+        self.write([{'op': op, **payload}])
+
+    def write(self, records):
+        data = _encode(records)
+        with self._lock:
+            file = self._open()
+            file.write(data)
+            file.flush()
+            self._pending += len(records)
+            self._appended += len(records)
+            if self._pending >= SYNC_EVERY or time.monotonic() - self._synced >= SYNC_INTERVAL:
+                self._sync()
+            # the timer also closes the file once writes stop, so idle sessions hold no file descriptor
+            if self._timer is None:
+                self._timer = threading.Timer(SYNC_INTERVAL, self.sync)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _sync(self):
+        if self._file is not None:
+            os.fsync(self._file.fileno())
+        self._pending = 0
+        self._synced = time.monotonic()
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def sync(self):
+        '''Syncs whatever is pending and closes the file; the next record reopens it.'''
+        with self._lock:
+            self._timer = None
+            if self._pending:
+                self._sync()
+            self._close()
+
+    def restore(self):
+        self.sync()
+        if not self.exists():
+            return Session()
+        with open(self.path, 'rb') as file:
+            return replay(file)
+
+    def needs_compaction(self):
+        '''True once the records appended since the last compaction outnumber the ones it kept, so rewriting stays
+        amortized O(1) per action.'''
+        return not self._compacting and self._appended >= max(COMPACT_EVERY, self._live)
+
+    def compact(self):
+        '''Rewrites the journal as the few records it replays to. Meant for a background thread: appends only wait
+        for the final copy of whatever arrived while the snapshot was being written.'''
+        with self._lock:
+            if self._compacting:
+                return
+            self._compacting = True
+            if self._file is not None:
+                self._file.flush()
+            end, appended = os.path.getsize(self.path), self._appended
+        try:
+            with open(self.path, 'rb') as file:
+                records = replay(_lines(file, end)).records()
+            temporary = f'{self.path}.tmp'
+            with open(temporary, 'wb') as out:
+                out.write(_encode(records))
+                with self._lock:
+                    with open(self.path, 'rb') as file:
+                        file.seek(end)
+                        shutil.copyfileobj(file, out)
+                    out.flush()
+                    os.fsync(out.fileno())
+                    self._close()
+                    os.replace(temporary, self.path)
+                    self._pending = 0
+                    self._live = len(records)
+                    self._appended -= appended
+        finally:
+            self._compacting = False
+
+    def close(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._sync()
+            self._close()
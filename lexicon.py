@@ -0,0 +1,138 @@
+import gzip
+import json
+import os
+import threading
+from collections import Counter
+
+START = '<S>'
+END = '</S>'
+
+
+def _feats(value):
+    if isinstance(value, dict):
+        return '|'.join(f'{key}={val}' for key, val in value.items()) or '_'
+    return value or '_'
+
+
+def _bump(counter: Counter, key, step: int):
+    '''Adds `step` to a count, dropping it once nothing is left so forgotten values are never suggested.'''
+    counter[key] += step
+    if counter[key] <= 0:
+        del counter[key]
+
+
+def _best(counter: Counter):
+    return max(counter, key=counter.__getitem__) if counter else None
+
+
+class Lexicon:
+    '''Frequency index of FORM -> LEMMA/UPOS/FEATS and of UPOS contexts -> DEPREL and head offset.
+    Adding a sentence costs O(its tokens); lookups are a few dict reads.'''
+
+    def __init__(self):
+        self._forms = {}
+        self._arcs = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._saved = None
+        self._changes = 0
+        self.sentences = 0
+
+    def __len__(self):
+        return len(self._forms)
+
+    def _count(self, sentence, step: int):
+        words = [token for token in sentence if isinstance(token['id'], int)]
+        tags = [START] + [token.get('upos') or '_' for token in words] + [END]
+        with self._lock:
+            for i, token in enumerate(words, 1):
+                # untagged tokens, such as those of a blank pre-annotation, would only teach '_'
+                if tags[i] == '_':
+                    continue
+                form = str(token['form']).lower()
+                entry = self._forms.setdefault(form, (Counter(), Counter(), Counter()))
+                _bump(entry[0], token.get('lemma') or '_', step)
+                _bump(entry[1], tags[i], step)
+                _bump(entry[2], _feats(token.get('feats')), step)
+                if not entry[1]:
+                    del self._forms[form]
+                if token.get('head') is None or not token.get('deprel'):
+                    continue
+                offset = 0 if token['head'] == 0 else token['head'] - token['id']
+                deprel = 'ROOT' if token['deprel'].lower() == 'root' else token['deprel']
+                for key in ((tags[i], tags[i - 1], tags[i + 1]), (tags[i],)):
+                    arcs = self._arcs.setdefault(key, Counter())
+                    _bump(arcs, (deprel, offset), step)
+                    if not arcs:
+                        del self._arcs[key]
+            self.sentences = max(self.sentences + step, 0)
+            self._changes += 1
+
+    def add_sentence(self, sentence):
+        self._count(sentence, 1)
+
+    def remove_sentence(self, sentence):
+        '''Takes back what add_sentence() learnt from `sentence`, as when an annotator corrects it.'''
+        self._count(sentence, -1)
+
+    def replace_sentence(self, old, new):
+        self.remove_sentence(old)
+        self.add_sentence(new)
+
+    def add_sentences(self, sentences):
+        for sentence in sentences:
+            self.add_sentence(sentence)
+
+    def suggest(self, form: str):
+        '''(lemma, upos, feats) most often seen with `form`, or None.'''
+        with self._lock:
+            entry = self._forms.get(str(form).lower())
+            if entry is None:
+                return None
+            return tuple(_best(counter) for counter in entry)
+
+    def suggest_arc(self, upos: str, left: str = START, right: str = END):
+        '''(deprel, head offset) most often seen for `upos` between `left` and `right`, backing off to `upos` alone.'''
+        with self._lock:
+            arcs = self._arcs.get((upos, left, right)) or self._arcs.get((upos,))
+            return _best(arcs) if arcs else None
+
+    def to_dict(self):
+        with self._lock:
+            return {'sentences': self.sentences,
+                    'forms': {form: [dict(counter) for counter in entry] for form, entry in self._forms.items()},
+                    'arcs': [[list(key), [[deprel, offset, count] for (deprel, offset), count in arcs.items()]]
+                             for key, arcs in self._arcs.items()]}
+
+    @classmethod
+    def from_dict(cls, data):
+        lexicon = cls()
+        lexicon.sentences = data.get('sentences', 0)
+        lexicon._forms = {form: tuple(Counter(counts) for counts in entry) for form, entry in data.get('forms', {}).items()}
+        lexicon._arcs = {tuple(key): Counter({(deprel, offset): count for deprel, offset, count in arcs})
+                         for key, arcs in data.get('arcs', [])}
+        return lexicon
+
+    def save(self, path: str):
+        '''Writes gzipped JSON to a temporary file and swaps it in, so a crash never leaves a half-written lexicon.
+        Queued saves of an unchanged lexicon are skipped.'''
+        with self._save_lock:
+            with self._lock:
+                changes = self._changes
+            if self._saved == (path, changes):
+                return
+            data = self.to_dict()
+            temporary = f'{path}.tmp'
+            with gzip.open(temporary, 'wt', encoding='utf-8') as file:
+                json.dump(data, file, ensure_ascii=False, separators=(',', ':'))
+            os.replace(temporary, path)
+            self._saved = (path, changes)
+
+    @classmethod
+    def load(cls, path: str):
+        if not os.path.exists(path):
+            return cls()
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            lexicon = cls.from_dict(json.load(file))
+        lexicon._saved = (path, lexicon._changes)
+        return lexicon
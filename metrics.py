@@ -0,0 +1,131 @@
+import json
+import logging
+import sys
+import threading
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+from logging.handlers import RotatingFileHandler
+from time import perf_counter
+
+import numpy as np
+
+from corpus import Corpus
+from tokenstore import TokenStore
+
+LOG_PATH = 'log.txt'
+MAX_BYTES = 5 << 20
+BACKUPS = 3
+# durations kept per event for the percentiles on the PERFORMANCE page
+WINDOW = 1024
+
+_LOCK = threading.Lock()
+_COUNTERS = Counter()
+_TIMINGS = {}
+_LOGGER = logging.getLogger('yordepan')
+
+
+class JSONFormatter(logging.Formatter):
+    '''One JSON object per line: time, level, event and whatever fields the event carried.'''
+
+    def format(self, record):
+        entry = {'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+                 'level': record.levelname, 'event': record.getMessage()}
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['error'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup(path: str = LOG_PATH, level: int = logging.INFO):
+    '''Opens the rotating log the first time it is called in a process; later calls (every rerun) do nothing.'''
+    with _LOCK:
+        if _LOGGER.handlers:
+            return _LOGGER
+        handler = RotatingFileHandler(path, maxBytes=MAX_BYTES, backupCount=BACKUPS, encoding='utf-8')
+        handler.setFormatter(JSONFormatter())
+        _LOGGER.addHandler(handler)
+        _LOGGER.setLevel(level)
+        _LOGGER.propagate = False
+    log('start', python=sys.version.split()[0])
+    return _LOGGER
+
+
+def log(event: str, level: int = logging.INFO, **fields):
+    if _LOGGER.isEnabledFor(level):
+        _LOGGER.log(level, event, extra={'fields': fields})
+
+
+def count(name: str, amount: int = 1):
+    with _LOCK:
+        _COUNTERS[name] += amount
+
+
+def observe(name: str, seconds: float, **fields):
+    '''Records one duration and logs it with `fields`.'''
+    with _LOCK:
+        timings = _TIMINGS.get(name)
+        if timings is None:
+            timings = _TIMINGS[name] = [0, 0.0, deque(maxlen=WINDOW)]
+        timings[0] += 1
+        timings[1] += seconds
+        timings[2].append(seconds)
+    log(name, ms=round(seconds * 1000, 3), **fields)
+
+
+@contextmanager
+def timed(name: str, **fields):
+    '''Times the block; fields may be added to the yielded dict before it ends. Errors are logged with the timing,
+    while BaseExceptions such as Streamlit's stop and rerun signals just end it.'''
+    start = perf_counter()
+    try:
+        yield fields
+    except Exception as error:
+        fields['failed'] = type(error).__name__
+        raise
+    finally:
+        observe(name, perf_counter() - start, **fields)
+
+
+def timer(name: str):
+    '''Decorator logging every call of a function under `name`, as timed() does for a block. Fragments need it:
+    when one reruns on its own, the script-wide rerun timing never sees it.'''
+    def decorate(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with timed(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def snapshot():
+    '''(counters, timings) where timings maps an event to count, total, mean, p50, p95 and max in milliseconds.'''
+    with _LOCK:
+        counters = dict(_COUNTERS)
+        timings = {name: (calls, total, np.array(recent)) for name, (calls, total, recent) in _TIMINGS.items()}
+    return counters, {name: {'count': calls, 'total_ms': total * 1000, 'mean_ms': total * 1000 / calls,
+                             'p50_ms': float(np.percentile(recent, 50)) * 1000, 'p95_ms': float(np.percentile(recent, 95)) * 1000,
+                             'max_ms': float(recent.max()) * 1000}
+                      for name, (calls, total, recent) in timings.items()}
+
+
+def reset():
+    with _LOCK:
+        _COUNTERS.clear()
+        _TIMINGS.clear()
+
+
+def state_size(state):
+    '''Approximate bytes held per session-state key.'''
+    sizes = {}
+    for key in list(state.keys()):
+        value = state[key]
+        if isinstance(value, Corpus):
+            sizes[key] = value.size
+        elif isinstance(value, TokenStore):
+            sizes[key] = sum(sys.getsizeof(field) for token in value for field in token)
+        else:
+            sizes[key] = sys.getsizeof(value)
+    return sizes
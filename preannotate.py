@@ -0,0 +1,64 @@
+import os
+
+from tagsets import DEPREL, UPOS
+from tokenstore import Token, TokenStore
+
+try:
+    import spacy
+    from spacy.tokens import Doc
+except ImportError:
+    spacy = None
+
+BATCH_SIZE = 64
+# labels from spaCy's non-UD (ClearNLP-style) parsers that have a UD counterpart in DEPREL
+LABELS = {'dobj': 'obj', 'pobj': 'obl', 'nsubjpass': 'nsubj:pass', 'csubjpass': 'csubj:pass', 'auxpass': 'aux:pass',
+          'poss': 'nmod:poss', 'neg': 'advmod', 'npadvmod': 'obl', 'relcl': 'acl:relcl', 'prt': 'compound:prt',
+          'dative': 'iobj', 'attr': 'xcomp', 'oprd': 'xcomp', 'nn': 'compound'}
+
+
+def available():
+    return spacy is not None
+
+
+def load_model(name: str = ''):
+    '''An installed package or a model directory if `name` is one, otherwise a blank pipeline for the language code in `name`.
+    Never touches the network.'''
+    if spacy is None:
+        raise ImportError('spaCy is not installed')
+    name = name.strip() or 'xx'
+    if os.path.isdir(name) or spacy.util.is_package(name):
+        return spacy.load(name)
+    return spacy.blank(name)
+
+
+def _upos(token):
+    return token.pos_ if token.pos_ in UPOS else ('X' if token.pos_ else '_')
+
+
+def _deprel(token):
+    if token.head.i == token.i:
+        return 'ROOT'
+    deprel = LABELS.get(token.dep_.lower(), token.dep_.lower())
+    return deprel if deprel in DEPREL else 'dep'
+
+
+def to_store(doc):
+    parsed = doc.has_annotation('DEP')
+    return TokenStore(Token(token.i + 1, token.text,
+                            token.lemma_ or '_',
+                            _upos(token), token.tag_ or '_',
+                            str(token.morph) or '_',
+                            (0 if token.head.i == token.i else token.head.i + 1) if parsed else None,
+                            _deprel(token) if parsed else '_')
+                      for token in doc)
+
+
+def preannotate(nlp, sentences, n_process: int = 1, batch_size: int = BATCH_SIZE):
+    '''Runs `nlp` over already tokenized sentences (lists of FORMs) so IDs line up with the app's tokenizer.
+    Yields one TokenStore per sentence, in order. A pipeline with no components runs in-process: shipping Docs
+    to workers would cost far more than the nothing they would do there.'''
+    if not nlp.pipe_names:
+        n_process = 1
+    docs = (Doc(nlp.vocab, words=list(words)) for words in sentences)
+    for doc in nlp.pipe(docs, n_process=n_process, batch_size=batch_size):
+        yield to_store(doc)
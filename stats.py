@@ -0,0 +1,175 @@
+import argparse
+import sys
+from collections import deque
+
+import numpy as np
+
+from corpus import ANNOTATOR, iter_blocks
+
+NO_HEAD = -1
+
+
+def _deprel(value: str):
+    return 'ROOT' if value.lower() == 'root' else value
+
+
+class Columns:
+    '''Syntactic words of a treebank as parallel NumPy arrays, plus one entry per sentence for its key and annotator.
+    Multiword token ranges and empty nodes are left out, as the UD evaluation script does.'''
+    __slots__ = ('sentence', 'head', 'upos', 'deprel', 'keys', 'annotators', 'starts', 'lengths')
+
+    def __init__(self, sentence, head, upos, deprel, keys, annotators):
+        self.sentence = np.asarray(sentence, dtype=np.int64)
+        self.head = np.asarray(head, dtype=np.int64)
+        self.upos = np.asarray(upos, dtype=str)
+        self.deprel = np.asarray(deprel, dtype=str)
+        self.keys = list(keys)
+        self.annotators = np.asarray(annotators, dtype=str)
+        self.lengths = np.bincount(self.sentence, minlength=len(self.keys))
+        self.starts = np.concatenate(([0], np.cumsum(self.lengths)[:-1])).astype(np.int64)
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def tokens(self):
+        return len(self.head)
+
+    @classmethod
+    def from_blocks(cls, blocks, annotator: str = None):
+        '''Reads CoNLL-U sentence blocks. Sentences are keyed by their word forms, so two annotations of the same
+        sentence line up however their comments differ. `annotator` overrides the # ANNOTATOR comments.'''
+        sentence, head, upos, deprel, keys, annotators = [], [], [], [], [], []
+        for block in blocks:
+            forms, metadata = [], {}
+            for line in block.split('\n'):
+                if line.startswith('#'):
+                    key, _, value = line[1:].partition('=')
+                    metadata.setdefault(key.strip(), value.strip())
+                    continue
+                fields = line.split('\t')
+                if len(fields) != 10 or not fields[0].isdigit():
+                    continue
+                forms.append(fields[1])
+                head.append(int(fields[6]) if fields[6].isdigit() else NO_HEAD)
+                upos.append(fields[3])
+                deprel.append(_deprel(fields[7]))
+            if forms:
+                sentence.extend([len(keys)] * len(forms))
+                keys.append('\t'.join(forms))
+                annotators.append(annotator or metadata.get(ANNOTATOR, 'ANONYMOUS'))
+        return cls(sentence, head, upos, deprel, keys, annotators)
+
+    @classmethod
+    def from_stream(cls, stream, annotator: str = None):
+        return cls.from_blocks((block for _, block in iter_blocks(stream)), annotator)
+
+    @classmethod
+    def concat(cls, parts):
+        parts = list(parts)
+        offsets = np.cumsum([0] + [len(part) for part in parts])
+        return cls(np.concatenate([part.sentence + offset for part, offset in zip(parts, offsets)] or [[]]),
+                   np.concatenate([part.head for part in parts] or [[]]),
+                   np.concatenate([part.upos for part in parts] or [[]]),
+                   np.concatenate([part.deprel for part in parts] or [[]]),
+                   [key for part in parts for key in part.keys],
+                   np.concatenate([part.annotators for part in parts] or [[]]))
+
+    def select(self, sentences):
+        '''A Columns holding only the sentences whose positions are listed in `sentences`, in that order.'''
+        sentences = np.asarray(sentences, dtype=np.int64)
+        index = _gather(self.starts[sentences], self.lengths[sentences])
+        return Columns(np.repeat(np.arange(len(sentences)), self.lengths[sentences]),
+                       self.head[index], self.upos[index], self.deprel[index],
+                       [self.keys[i] for i in sentences], self.annotators[sentences])
+
+    def by_annotator(self, annotator: str):
+        return self.select(np.flatnonzero(self.annotators == annotator))
+
+
+def _gather(starts, lengths):
+    '''Token positions of the sentences starting at `starts`, concatenated, without a Python loop.'''
+    if not len(lengths):
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
+
+
+def align(gold: Columns, other: Columns):
+    '''Positions of the sentences both versions annotated, paired up. A sentence that occurs several times is paired
+    occurrence by occurrence.'''
+    waiting = {}
+    for i, key in enumerate(other.keys):
+        waiting.setdefault(key, deque()).append(i)
+    pairs = []
+    for i, key in enumerate(gold.keys):
+        if waiting.get(key):
+            pairs.append((i, waiting[key].popleft()))
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def kappa(x, y):
+    '''Cohen's kappa between two label arrays of the same length.'''
+    if not len(x):
+        return float('nan')
+    labels, codes = np.unique(np.concatenate((x, y)), return_inverse=True)
+    x, y = codes[:len(x)], codes[len(x):]
+    observed = np.mean(x == y)
+    expected = np.dot(np.bincount(x, minlength=len(labels)), np.bincount(y, minlength=len(labels))) / len(x) ** 2
+    return 1.0 if expected == 1 else float((observed - expected) / (1 - expected))
+
+
+def agreement(gold: Columns, other: Columns):
+    '''UAS, LAS, UPOS accuracy and Cohen's kappa of `other` against `gold` over the sentences both annotated.'''
+    left, right = align(gold, other)
+    a = _gather(gold.starts[left], gold.lengths[left])
+    b = _gather(other.starts[right], other.lengths[right])
+    heads = gold.head[a] == other.head[b]
+    labels = gold.deprel[a] == other.deprel[b]
+    score = (lambda values: float(values.mean()) if len(values) else float('nan'))
+    return {'sentences': len(left), 'tokens': len(a),
+            'only_gold': len(gold) - len(left), 'only_other': len(other) - len(right),
+            'UAS': score(heads), 'LAS': score(heads & labels), 'UPOS': score(gold.upos[a] == other.upos[b]),
+            'UPOS_KAPPA': kappa(gold.upos[a], other.upos[b]), 'DEPREL_KAPPA': kappa(gold.deprel[a], other.deprel[b])}
+
+
+def _counts(values):
+    labels, counts = np.unique(values, return_counts=True)
+    order = np.argsort(-counts, kind='stable')
+    return dict(zip(labels[order].tolist(), counts[order].tolist()))
+
+
+def describe(columns: Columns):
+    '''Sizes, UPOS and DEPREL distributions and the sentence length histogram (index = length).'''
+    return {'sentences': len(columns), 'tokens': columns.tokens,
+            'mean_length': float(columns.lengths.mean()) if len(columns) else 0.0,
+            'annotators': _counts(columns.annotators),
+            'upos': _counts(columns.upos), 'deprel': _counts(columns.deprel),
+            'lengths': np.bincount(columns.lengths)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='TREEBANK STATISTICS AND INTER-ANNOTATOR AGREEMENT.')
+    parser.add_argument('gold', help='CoNLL-U file to describe')
+    parser.add_argument('other', nargs='?', help='a second annotation of the same sentences to score against the first')
+    args = parser.parse_args(argv)
+    with open(args.gold, encoding='utf-8') as stream:
+        gold = Columns.from_stream(stream)
+    if args.other is None:
+        summary = describe(gold)
+        print(f'{summary["sentences"]} SENTENCE(S), {summary["tokens"]} TOKEN(S), {summary["mean_length"]:.1f} TOKENS PER SENTENCE')
+        for name in ('annotators', 'upos', 'deprel'):
+            print(f'\n{name.upper()}')
+            for label, count in summary[name].items():
+                print(f'{count:>8} {100 * count / max(summary["tokens"], 1):6.2f}% {label}' if name != 'annotators' else f'{count:>8} {label}')
+        return 0
+    with open(args.other, encoding='utf-8') as stream:
+        other = Columns.from_stream(stream)
+    for name, value in agreement(gold, other).items():
+        print(f'{name:>12} {value:.4f}' if isinstance(value, float) else f'{name:>12} {value}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
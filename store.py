@@ -0,0 +1,297 @@
+import argparse
+import hashlib
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from itertools import groupby, islice
+from queue import Empty, SimpleQueue
+
+from corpus import ANNOTATOR, SOURCE, iter_blocks
+
+FIELDS = ('id', 'form', 'lemma', 'upos', 'xpos', 'feats', 'head', 'deprel', 'deps', 'misc')
+TOKEN_COLUMNS = ', '.join(f't."{field}"' for field in FIELDS)
+BATCH_SIZE = 1000
+CLAIM_SECONDS = 30 * 60
+SCHEMA = f'''
+CREATE TABLE IF NOT EXISTS sentences (
+    id INTEGER PRIMARY KEY,
+    sent_id TEXT,
+    text TEXT NOT NULL,
+    annotator TEXT,
+    source TEXT NOT NULL DEFAULT 'OTHER',
+    comments TEXT NOT NULL,
+    annotated INTEGER NOT NULL DEFAULT 1,
+    claimed_by TEXT,
+    claimed_at REAL,
+    updated REAL NOT NULL,
+    digest TEXT
+);
+CREATE INDEX IF NOT EXISTS sentences_pending ON sentences (id) WHERE annotated = 0;
+CREATE INDEX IF NOT EXISTS sentences_annotator ON sentences (annotator, id);
+CREATE INDEX IF NOT EXISTS sentences_source ON sentences (source, id);
+CREATE INDEX IF NOT EXISTS sentences_sent_id ON sentences (sent_id);
+CREATE INDEX IF NOT EXISTS sentences_updated ON sentences (updated);
+CREATE UNIQUE INDEX IF NOT EXISTS sentences_digest ON sentences (digest);
+CREATE TABLE IF NOT EXISTS tokens (
+    sentence INTEGER NOT NULL REFERENCES sentences (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    {', '.join(f'"{field}" TEXT NOT NULL' for field in FIELDS)},
+    PRIMARY KEY (sentence, position)
+) WITHOUT ROWID;
+'''
+
+
+class Block:
+    '''One CoNLL-U sentence split into the columns the store indexes. `digest` hashes its comments and tokens,
+    so the same sentence stored twice, by two uploads of one file say, is recognised.'''
+    __slots__ = ('sent_id', 'text', 'annotator', 'source', 'comments', 'tokens', 'digest')
+
+    def __init__(self, block: str):
+        comments, self.tokens, metadata = [], [], {}
+        for line in block.strip('\n').split('\n'):
+            if line.startswith('#'):
+                comments.append(line)
+                key, _, value = line[1:].partition('=')
+                metadata.setdefault(key.strip(), value.strip())
+            elif line.strip():
+                fields = line.split('\t')
+                if len(fields) != len(FIELDS):
+                    raise ValueError(f'Expected {len(FIELDS)} tab-separated fields, found {len(fields)}: {line!r}')
+                self.tokens.append(fields)
+        self.comments = '\n'.join(comments)
+        self.sent_id = metadata.get('sent_id')
+        self.text = metadata.get('Text', metadata.get('text', ' '.join(token[1] for token in self.tokens)))
+        self.annotator = metadata.get(ANNOTATOR, 'ANONYMOUS')
+        self.source = metadata.get(SOURCE, 'OTHER')
+        self.digest = hashlib.sha256('\n'.join([self.comments] + ['\t'.join(token) for token in self.tokens]).encode('utf-8')).hexdigest()
+
+
+def _skeleton(text: str, source: str, sent_id: str = None):
+    return f'# sent_id = {sent_id}\n# Text = {text}\n# Ref = {source}' if sent_id else f'# Text = {text}\n# Ref = {source}'
+
+
+class Store:
+    '''A treebank shared by every session on the server, in one SQLite database in WAL mode.
+    Each call borrows its own connection, so readers never wait and writers only queue inside SQLite
+    for the few milliseconds of their own transaction.'''
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        self._pool = SimpleQueue()
+        with self._connect() as connection:
+            connection.execute('PRAGMA journal_mode = WAL')
+            # databases made before sentences were deduplicated get the column; their existing rows stay unhashed
+            columns = {row[1] for row in connection.execute('PRAGMA table_info(sentences)')}
+            if columns and 'digest' not in columns:
+                connection.execute('ALTER TABLE sentences ADD COLUMN digest TEXT')
+            connection.executescript(SCHEMA)
+
+    def _open(self):
+        connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+        # WAL only needs the log synced at checkpoints to stay consistent after a crash
+        connection.execute('PRAGMA synchronous = NORMAL')
+        connection.execute('PRAGMA foreign_keys = ON')
+        return connection
+
+    @contextmanager
+    def _connect(self):
+        try:
+            connection = self._pool.get_nowait()
+        except Empty:
+            connection = self._open()
+        try:
+            yield connection
+        finally:
+            if connection.in_transaction:
+                connection.rollback()
+            self._pool.put(connection)
+
+    @contextmanager
+    def _write(self):
+        '''A transaction that takes SQLite's write lock up front, so it waits at BEGIN instead of failing midway.'''
+        with self._connect() as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            yield connection
+            connection.execute('COMMIT')
+
+    def __len__(self):
+        with self._connect() as connection:
+            return connection.execute('SELECT count(*) FROM sentences WHERE annotated = 1').fetchone()[0]
+
+    def version(self):
+        '''Changes whenever an annotated sentence is added or filled in, without reading the sentences themselves.'''
+        with self._connect() as connection:
+            count, updated = connection.execute('SELECT count(*), max(updated) FROM sentences WHERE annotated = 1').fetchone()
+            return f'{count}:{updated}'
+
+    def _insert(self, connection, block: Block, annotated: bool = True, now: float = None):
+        '''Returns the new row id, or None if the same sentence is already stored.'''
+        row = connection.execute('INSERT INTO sentences (sent_id, text, annotator, source, comments, annotated, updated, digest) '
+                                 'VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (digest) DO NOTHING RETURNING id',
+                                 (block.sent_id, block.text, block.annotator if annotated else None, block.source,
+                                  block.comments, int(annotated), now or time.time(), block.digest)).fetchone()
+        if row is None:
+            return None
+        self._insert_tokens(connection, row[0], block.tokens)
+        return row[0]
+
+    def _insert_tokens(self, connection, id: int, tokens):
+        connection.executemany(f'INSERT INTO tokens VALUES ({", ".join("?" * (len(FIELDS) + 2))})',
+                               ((id, position, *fields) for position, fields in enumerate(tokens)))
+
+    def add(self, block: str):
+        '''Stores one annotated sentence and returns its row id, or None if it is already stored.'''
+        block = Block(block)
+        with self._write() as connection:
+            return self._insert(connection, block)
+
+    def add_many(self, blocks, annotated: bool = True, errors: list = None):
+        '''Stores CoNLL-U blocks BATCH_SIZE per transaction, so other sessions can write in between.
+        Unannotated blocks become work for `pending` and `claim`. A block that cannot be read is skipped without
+        holding up its neighbours, and (position, message) is appended to `errors` if given.
+        Returns how many were new; the rest were already stored or skipped.'''
+        count, position, blocks = 0, 0, iter(blocks)
+        while raw := list(islice(blocks, BATCH_SIZE)):
+            batch = []
+            for position, block in enumerate(raw, position):
+                try:
+                    batch.append(Block(block))
+                except ValueError as error:
+                    if errors is not None:
+                        errors.append((position, str(error)))
+            position += 1
+            now = time.time()
+            with self._write() as connection:
+                for block in batch:
+                    count += self._insert(connection, block, annotated, now) is not None
+        return count
+
+    def add_texts(self, lines, source: str = 'OTHER', prefix: str = None):
+        '''Queues raw sentences, one per line, for annotation.'''
+        lines = (line.strip() for line in lines)
+        lines = (line for line in lines if line)
+        return self.add_many((_skeleton(line, source, None if prefix is None else f'{prefix}{i}')
+                              for i, line in enumerate(lines, 1)), annotated=False)
+
+    def annotate(self, id: int, block: str):
+        '''Fills in a pending sentence. Returns False if someone else annotated it first.'''
+        block = Block(block)
+        with self._write() as connection:
+            row = connection.execute('SELECT sent_id FROM sentences WHERE id = ? AND annotated = 0', (id,)).fetchone()
+            if row is None:
+                return False
+            if not block.sent_id and row[0]:
+                block = Block(f'# sent_id = {row[0]}\n{block.comments}\n' + '\n'.join('\t'.join(token) for token in block.tokens))
+            try:
+                connection.execute('UPDATE sentences SET annotator = ?, comments = ?, annotated = 1, claimed_by = NULL, '
+                                   'claimed_at = NULL, updated = ?, digest = ? WHERE id = ?',
+                                   (block.annotator, block.comments, time.time(), block.digest, id))
+            except sqlite3.IntegrityError:
+                # this very annotation is already stored, so the queued copy is no longer needed
+                connection.execute('DELETE FROM sentences WHERE id = ?', (id,))
+                return True
+            self._insert_tokens(connection, id, block.tokens)
+            return True
+
+    def pending(self, limit: int = 50, offset: int = 0):
+        '''(id, sent_id, text, source) of sentences nobody has annotated yet, oldest first.'''
+        with self._connect() as connection:
+            return connection.execute('SELECT id, sent_id, text, source FROM sentences WHERE annotated = 0 '
+                                      'ORDER BY id LIMIT ? OFFSET ?', (limit, offset)).fetchall()
+
+    def claim(self, annotator: str, seconds: float = CLAIM_SECONDS):
+        '''Reserves the oldest pending sentence nobody else is working on, so two annotators never get the same one.
+        Returns (id, text) or None.'''
+        now = time.time()
+        with self._write() as connection:
+            return connection.execute('UPDATE sentences SET claimed_by = ?, claimed_at = ? WHERE id = ('
+                                      'SELECT id FROM sentences WHERE annotated = 0 AND (claimed_by IS NULL OR claimed_by = ? OR claimed_at < ?) '
+                                      'ORDER BY id LIMIT 1) RETURNING id, text',
+                                      (annotator, now, annotator, now - seconds)).fetchone()
+
+    def counts(self):
+        '''{annotator: sentences annotated}, plus the number still pending under None.'''
+        with self._connect() as connection:
+            return dict(connection.execute('SELECT annotator, count(*) FROM sentences GROUP BY annotator'))
+
+    def tokens_by(self, annotator: str):
+        '''Yields (sentence id, *FIELDS) for every token annotated by `annotator`.'''
+        with self._connect() as connection:
+            yield from connection.execute(f'SELECT t.sentence, {TOKEN_COLUMNS} '
+                                          'FROM sentences s JOIN tokens t ON t.sentence = s.id '
+                                          'WHERE s.annotator = ? ORDER BY t.sentence, t.position', (annotator,))
+
+    def iter_blocks(self, annotator: str = None, source: str = None, annotated: bool = True):
+        '''Yields CoNLL-U blocks straight off one cursor; only the current sentence's rows are held in memory.'''
+        where, parameters = ['s.annotated = ?'], [int(annotated)]
+        for column, value in (('annotator', annotator), ('source', source)):
+            if value is not None:
+                where.append(f's.{column} = ?')
+                parameters.append(value)
+        with self._connect() as connection:
+            rows = connection.execute(f'SELECT s.id, s.comments, {TOKEN_COLUMNS} '
+                                      'FROM sentences s LEFT JOIN tokens t ON t.sentence = s.id '
+                                      f'WHERE {" AND ".join(where)} ORDER BY s.id, t.position', parameters)
+            for _, group in groupby(rows, key=lambda row: row[0]):
+                group = list(group)
+                lines = [group[0][1]] if group[0][1] else []
+                lines.extend('\t'.join(row[2:]) for row in group if row[2] is not None)
+                yield '\n'.join(lines) + '\n\n'
+
+    def export(self, out, **filters):
+        '''Writes the matching sentences to a text stream. Returns how many were written.'''
+        count = 0
+        for count, block in enumerate(self.iter_blocks(**filters), 1):
+            out.write(block)
+        return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='MANAGE THE SHARED TREEBANK.')
+    parser.add_argument('database', help='SQLite file of the shared treebank')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    load = commands.add_parser('load', help='add CoNLL-U files, or queue raw text (one sentence per line) for annotation')
+    load.add_argument('inputs', nargs='+', help='.conllu files are stored as annotated; anything else is raw text')
+    load.add_argument('--source', default=None, help='value for # Ref of raw sentences (defaults to the file name)')
+
+    dump = commands.add_parser('export', help='stream annotated sentences to CoNLL-U')
+    dump.add_argument('-o', '--output', default='-', help='CoNLL-U file to write, or - for stdout')
+    dump.add_argument('--annotator', default=None, help='only sentences by this annotator')
+    dump.add_argument('--source', default=None, help='only sentences from this source')
+
+    commands.add_parser('status', help='sentences per annotator and how many are still pending')
+
+    args = parser.parse_args(argv)
+    store = Store(args.database)
+    if args.command == 'load':
+        for path in args.inputs:
+            with open(path, encoding='utf-8') as stream:
+                if path.endswith('.conllu'):
+                    errors = []
+                    count = store.add_many((block for _, block in iter_blocks(stream)), errors=errors)
+                    for position, error in errors:
+                        print(f'{path}: SENTENCE {position + 1} SKIPPED: {error}', file=sys.stderr)
+                    print(f'{path}: {count} SENTENCE(S) STORED', file=sys.stderr)
+                else:
+                    name = path.rsplit('/', 1)[-1]
+                    count = store.add_texts(stream, args.source or name, prefix=f'{name.rsplit(".", 1)[0]}-')
+                    print(f'{path}: {count} SENTENCE(S) QUEUED FOR ANNOTATION', file=sys.stderr)
+    elif args.command == 'export':
+        out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+        try:
+            count = store.export(out, annotator=args.annotator, source=args.source)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        print(f'{count} SENTENCE(S) WRITTEN', file=sys.stderr)
+    else:
+        for annotator, count in sorted(store.counts().items(), key=lambda item: -item[1]):
+            print(f'{count:>8} {annotator if annotator is not None else "(PENDING)"}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
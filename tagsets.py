@@ -0,0 +1,118 @@
+UPOS = {'ADJ':'ADJECTIVE',
+         'ADP':'ADPOSITION', 
+         'ADV':'ADVERB', 
+         'AUX':'AUXILLIARY', 
+         'CCONJ':'COORDINATING CONJUNCTION', 
+         'DET':'DETERMINER', 
+         'INTJ':'INTERJECTION', 
+         'NOUN':'NOUN', 
+         'NUM':'NUMBER', 
+         'PART':'PARTICIPLE', 
+         'PRON':'PRONOUN', 
+         'PROPN':'PROPER NOUN', 
+         'PUNCT':'PUNCTUATION', 
+         'SCONJ':'SUBORDINATING CONJUCTION', 
+         'SYM':'SYMBOL', 
+         'VERB':'VERB', 
+         'X':'UNDEFINED - PLEASE INDICATE THE APPROPRIATE POS TAG IN THE XPOS INPUT BOX'}
+DEPREL = {'acl':'clausal modifier of noun (adnominal clause)',
+                    'acl:relcl':'relative clause modifier',
+                    'advcl':'adverbial clause modifier',
+                    'advcl:relcl':'adverbial relative clause modifier',
+                    'advmod':'adverbial modifier',
+                    'advmod:emph':'emphasizing word, intensifier',
+                    'advmod:lmod':'locative adverbial modifier',
+                    'amod':'adjectival modifier',
+                    'appos':'appositional modifier',
+                    'aux':'auxilliary',
+                    'aux:pass':'passive auxilliary',
+                    'case':'case marking',
+                    'cc':'coordinating conjunction',
+                    'cc:preconj':'preconjuction',
+                    'ccomp':'clausal complement',
+                    'clf':'classifier',
+                    'compound':'compound',
+                    'compound:lvc':'light verb construction',
+                    'compound:prt':'phrasal verb particle',
+                    'compound:redup':'reduplicated compounds',
+                    'compound:svc':'serial verb compounds',
+                    'comp:aux':'auxilliary complement',
+                    'conj':'conjunct',
+                    'cop':'copula',
+                    'csubj':'clasual subject',
+                    'csubj:outer':'outer clause clausal subject',
+                    'csubj:pass':'clausal passive subject',
+                    'dep':'unknown dependency',
+                    'det:nomgov':'pronominal quantifier governing the case of the noun',
+                    'det:nummod':'pronominal quantifier agreeing in case with the noun',
+                    'det:poss':'possessive determiner',
+                    'discourse':'discourse element',
+                    'dislocated':'dislocated element',
+                    'expl':'expletive',
+                    'expl:impers':'impersonal expletive',
+                    'expl:pass':'reflexive pronoun used in reflexive passive',
+                    'expl:pv':'reflexive clitic with an inherently reflexive verb',
+                    'foc':'focus marker',
+                    'fixed':'fixed multiword expression',
+                    'flat':'flat expression',
+                    'flat:foreign':'foreign words',
+                    'flat:name':'names',
+                    'goeswith':'goes with',
+                    'iobj':'indirect object',
+                    'list':'list',
+                    'mark':'marker',
+                    'nmod':'nominal modifier',
+                    'nmod:poss':'possessive nominal modifier',
+                    'nmod:tmod':'temporal modifier',
+                    'nsubj':'nominal subject',
+                    'nsubj:outer':'outer clause nominal subject',
+                    'nsubj:pass':'passive nominal subject',
+                    'nummod':'numeric modifier',
+                    'nummod:gov':'numeric modifier governing the case of the noun',
+                    'obj':'object',
+                    'obl':'oblique nominal',
+                    'obl:agent':'oblique agent in passive construction',
+                    'obl:arg':'oblique argument',
+                    'obl:lmod':'locative modifier',
+                    'obl:tmod':'temporal modifier',
+                    'orphan':'orphan',
+                    'parataxis':'parataxis',
+                    'punct':'punctuation',
+                    'reparandum':'overriden disfluency',
+                    'ROOT':'root',
+                    'vocative':'vocative',
+                    'xcomp':'open clausal complement'}
+
+FEAT = {'_':'UNKNOWN/NOT APPLICABLE',
+        'Case=Nom': 'Nominative',
+        'Case=Acc': 'Accusative', 
+        'Case=Gen': 'Genitive',
+        'Case=Dat': 'Dative',
+        'Gender=Masc': 'Masculine',
+        'Gender=Fem': 'Feminine',
+        'Gender=Neut': 'Neuter',
+        'Number=Sing': 'Singular',
+        'Number=Plur': 'Plural',
+        'Tense=Past': 'Past Tense',
+        'Tense=Pres': 'Present Tense',
+        'Tense=Fut': 'Future Tense',
+        'Tense=Non-Fut': 'Non-Future Tense',
+        'Mood=Ind': 'Indicative',
+        'Mood=Imp': 'Imperative',
+        'Mood=Sub': 'Subjunctive',
+        'Person=1': 'First person',
+        'Person=2': 'Second person',
+        'Person=3': 'Third person',
+        'Polarity=Neg': 'Negation',
+        'Polarity=Pos': 'Positive',
+        'Voice=Act': 'Active voice',
+        'Voice=Pass': 'Passive voice',
+        'Aspect=Perf': 'Perfect',
+        'Aspect=Imp': 'Imperfect',
+        'Degree=Pos': 'Positive',
+        'Degree=Cmp': 'Comparative',
+        'Degree=Sup': 'Superlative',
+        'Definite=Def': 'Definite',
+        'Definite=Ind': 'Indefinite',
+        'VerbType=Trans': 'Transitive',
+        'VerbType=Intr': 'Intransitive'}
@@ -0,0 +1,35 @@
+from bulk import import_files, parse_file
+from corpus import Corpus
+
+
+def block(sent_id, *forms):
+    rows = [f'{id}\t{form}\t_\tNOUN\t_\t_\t{0 if id == 1 else 1}\t{"root" if id == 1 else "nmod"}\t_\t_'
+            for id, form in enumerate(forms, 1)]
+    return '\n'.join([f'# sent_id = {sent_id}'] + rows) + '\n\n'
+
+
+def test_short_rows_are_a_parse_error_with_their_line():
+    data = (block('s1', 'Mo', 'lọ') + '# sent_id = s2\n1\tMo\n2\tlọ\tlọ\n\n' + block('s3', 'ilé')).encode('utf-8')
+    report = parse_file('mixed.conllu', data)
+    assert [sentence.metadata['sent_id'] for sentence in report.sentences] == ['s1', 's3']
+    assert len(report.errors) == 1
+    line, message = report.errors[0]
+    assert line == 6 and 'FOUND 2' in message
+
+
+def test_files_are_appended_in_upload_order():
+    files = [(f'f{i}.conllu', ''.join(block(f'f{i}-{j}', 'w') for j in range(3)).encode('utf-8')) for i in range(3)]
+    corpus, seen = Corpus(), []
+    reports = import_files(files, corpus, lambda done, total, report: seen.append(done))
+    assert [report.name for report in reports] == ['f0.conllu', 'f1.conllu', 'f2.conllu']
+    assert [corpus.row(i)[0] for i in range(len(corpus))] == [f'f{i}-{j}' for i in range(3) for j in range(3)]
+    assert seen == [1, 2, 3]
+
+
+def test_a_file_already_added_is_skipped():
+    data = block('s1', 'Mo').encode('utf-8')
+    corpus = Corpus()
+    import_files([('a.conllu', data)], corpus)
+    reports = import_files([('b.conllu', data), ('c.conllu', data)], corpus)
+    assert all(report.skipped for report in reports)
+    assert len(corpus) == 1
@@ -0,0 +1,47 @@
+from corpus import Corpus
+
+BLOCK = '# sent_id = {id}\n# ANNOTATOR = {annotator}\n# text = {text}\n1\t{text}\t_\t_\t_\t_\t0\troot\t_\t_\n\n'
+
+
+def corpus(*texts):
+    corpus = Corpus()
+    for i, text in enumerate(texts):
+        corpus.add(BLOCK.format(id=f's{i}', annotator='ada' if i % 2 else 'tunde', text=text))
+    return corpus
+
+
+def test_ranges_merge_neighbours_until_an_edit_moves_one():
+    c = corpus('a', 'b', 'c')
+    assert len(list(c._ranges(3))) == 1
+    c.replace(1, BLOCK.format(id='s1', annotator='ada', text='B'))
+    # the new s1 sits at the end of the spool, after s2, so no two sentences in order are neighbours any more
+    assert list(c._ranges(3)) == c._offsets
+    assert list(c._ranges(1)) == c._offsets[:1]
+    assert b''.join(c.raw(i) for i in range(3)) == c.to_bytes()
+
+
+def test_ranges_merge_across_a_replaced_sentence_kept_in_order():
+    c = corpus('a', 'b', 'c')
+    c.replace(2, BLOCK.format(id='s2', annotator='tunde', text='C'))
+    # s0 and s1 are still neighbours; the old s2 now lies between s1 and the new s2
+    assert list(c._ranges(3)) == [(0, c._offsets[1][1]), c._offsets[2]]
+
+
+def test_chunks_follow_sentence_order_at_any_chunk_size():
+    c = corpus('a', 'b', 'c', 'd')
+    c.replace(0, BLOCK.format(id='s0', annotator='tunde', text='A'))
+    expected = b''.join(c.raw(i) for i in range(len(c)))
+    for size in (1, 7, 1 << 16):
+        assert b''.join(c.iter_chunks(size)) == expected
+    assert b''.join(c.iter_chunks(count=2)) == c.raw(0) + c.raw(1)
+    assert c.tail(2) == (c.raw(2) + c.raw(3)).decode('utf-8')
+
+
+def test_replace_updates_the_index_and_leaves_the_old_bytes_dead():
+    c = corpus('a', 'b')
+    size, version = c.size, c.version
+    c.replace(0, BLOCK.format(id='s9', annotator='ada', text='abc'))
+    assert c.find('s0') is None and c.find('s9')[0]['form'] == 'abc'
+    assert c.by_annotator('ada') == [0, 1] and 'tunde' not in c.annotators()
+    assert c.search('ABC') == [0] and c.search(sent_id='s1', annotator='ada') == [1]
+    assert c.size == size + 2 and c.version > version
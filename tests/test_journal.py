@@ -0,0 +1,63 @@
+import os
+import threading
+
+import journal
+from journal import Journal, exists
+
+TOKEN = 'abcdefgh12'
+
+
+def test_probing_a_token_creates_nothing(tmp_path):
+    directory = str(tmp_path / 'journal')
+    assert not exists(directory, TOKEN)
+    assert not exists(directory, '../etc')
+    session = Journal(directory, TOKEN)
+    assert not session.exists()
+    assert session.restore().sentences == []
+    assert not os.path.exists(directory)
+
+
+def test_file_is_closed_when_idle(tmp_path):
+    session = Journal(str(tmp_path), TOKEN)
+    session.record('session', user='A', source='S')
+    assert session.exists() and session._file is not None
+    session.sync()
+    assert session._file is None
+    session.record('convert', sentence='s1')
+    restored = session.restore()
+    assert (restored.user, restored.sentences) == ('A', ['s1'])
+    assert session._file is None
+
+
+def test_torn_tail_is_dropped(tmp_path):
+    session = Journal(str(tmp_path), TOKEN)
+    session.record('convert', sentence='s1')
+    session.close()
+    with open(session.path, 'ab') as file:
+        file.write(b'{"op":"convert","sent')
+    session = Journal(str(tmp_path), TOKEN)
+    session.record('convert', sentence='s2')
+    assert session.restore().sentences == ['s1', 's2']
+
+
+def test_edit_replaces_one_sentence(tmp_path):
+    session = Journal(str(tmp_path), TOKEN)
+    session.record('import', sentences=['s1', 's2'], digests=[])
+    session.record('edit', index=1, sentence='s2*')
+    session.record('edit', index=5, sentence='nowhere')
+    assert session.restore().sentences == ['s1', 's2*']
+
+
+def test_compaction_keeps_concurrent_appends(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal, 'COMPACT_EVERY', 50)
+    session = Journal(str(tmp_path), TOKEN)
+    for i in range(200):
+        session.record('convert', sentence=f's{i}')
+    assert session.needs_compaction()
+    writer = threading.Thread(target=lambda: [session.record('convert', sentence=f's{i}') for i in range(200, 400)])
+    writer.start()
+    session.compact()
+    writer.join()
+    session.compact()
+    assert session.restore().sentences == [f's{i}' for i in range(400)]
+    session.close()
@@ -0,0 +1,34 @@
+from conllu import parse
+
+from lexicon import Lexicon
+
+SENTENCE = '1\tMo\tmo\t{upos}\t_\t_\t2\tnsubj\t_\t_\n2\tlọ\tlọ\tVERB\t_\t_\t0\troot\t_\t_\n\n'
+
+
+def sentence(upos='PRON'):
+    return parse(SENTENCE.format(upos=upos))[0]
+
+
+def test_saving_an_edit_again_counts_it_once():
+    lexicon = Lexicon()
+    lexicon.add_sentence(sentence())
+    learnt = lexicon.to_dict()
+    for _ in range(3):
+        lexicon.replace_sentence(sentence(), sentence())
+    assert lexicon.to_dict() == learnt
+
+
+def test_an_edit_replaces_the_old_version():
+    lexicon = Lexicon()
+    lexicon.add_sentence(sentence())
+    lexicon.replace_sentence(sentence(), sentence('NOUN'))
+    assert lexicon.suggest('mo') == ('mo', 'NOUN', '_')
+    assert lexicon.suggest_arc('PRON', '<S>', 'VERB') is None
+    lexicon.remove_sentence(sentence('NOUN'))
+    assert lexicon.to_dict() == {'sentences': 0, 'forms': {}, 'arcs': []}
+
+
+def test_untagged_tokens_teach_nothing():
+    lexicon = Lexicon()
+    lexicon.add_sentence(parse('1\tMo\t_\t_\t_\t_\t_\t_\t_\t_\n\n')[0])
+    assert lexicon.suggest('mo') is None
@@ -0,0 +1,36 @@
+import math
+
+import numpy as np
+
+from stats import Columns, agreement, align, kappa
+
+BLOCK = '# ANNOTATOR = {annotator}\n1\t{first}\t_\t{upos}\t_\t_\t2\t{deprel}\t_\t_\n2\tlọ\t_\tVERB\t_\t_\t0\troot\t_\t_\n\n'
+
+
+def columns(annotator, *sentences):
+    return Columns.from_blocks([BLOCK.format(annotator=annotator, first=first, upos=upos, deprel=deprel)
+                                for first, upos, deprel in sentences])
+
+
+def test_kappa():
+    assert kappa(np.array(['A', 'B', 'A', 'B']), np.array(['A', 'B', 'A', 'B'])) == 1.0
+    assert kappa(np.array(['A', 'A', 'B', 'B']), np.array(['A', 'B', 'A', 'B'])) == 0.0
+    # every label the same on both sides: chance agreement is total, which counts as full agreement
+    assert kappa(np.array(['A', 'A']), np.array(['A', 'A'])) == 1.0
+    assert math.isnan(kappa(np.array([]), np.array([])))
+    assert math.isclose(kappa(np.array(['A', 'A', 'A', 'B']), np.array(['A', 'A', 'B', 'B'])), 0.5)
+
+
+def test_align_pairs_repeated_sentences_occurrence_by_occurrence():
+    gold = columns('ada', ('Mo', 'PRON', 'nsubj'), ('O', 'PRON', 'nsubj'), ('Mo', 'PRON', 'nsubj'))
+    other = columns('tunde', ('Mo', 'NOUN', 'obj'), ('Wọn', 'PRON', 'nsubj'), ('Mo', 'PRON', 'nsubj'), ('Mo', 'X', 'dep'))
+    left, right = align(gold, other)
+    assert left.tolist() == [0, 2] and right.tolist() == [0, 2]
+
+
+def test_agreement_only_scores_shared_sentences():
+    gold = columns('ada', ('Mo', 'PRON', 'nsubj'), ('O', 'PRON', 'nsubj'))
+    other = columns('tunde', ('Mo', 'PRON', 'obj'), ('Wọn', 'PRON', 'nsubj'))
+    scores = agreement(gold, other)
+    assert (scores['sentences'], scores['tokens'], scores['only_gold'], scores['only_other']) == (1, 2, 1, 1)
+    assert (scores['UAS'], scores['LAS'], scores['UPOS']) == (1.0, 0.5, 1.0)
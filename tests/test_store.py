@@ -0,0 +1,69 @@
+import io
+import sqlite3
+
+import store as store_module
+from store import Store
+
+BLOCK = '''# sent_id = s1
+# ANNOTATOR = A
+# Text = Mo lọ
+1\tMo\tmo\tPRON\t_\t_\t2\tnsubj\t_\t_
+2\tlọ\tlọ\tVERB\t_\t_\t0\troot\t_\t_
+
+'''
+
+
+def test_same_sentence_is_stored_once(tmp_path):
+    store = Store(str(tmp_path / 'treebank.sqlite3'))
+    assert store.add(BLOCK) is not None
+    assert store.add(BLOCK) is None
+    assert store.add_many([BLOCK, BLOCK.replace('= A', '= B')]) == 1
+    out = io.StringIO()
+    assert store.export(out) == 2
+    assert out.getvalue().count('# sent_id = s1') == 2
+
+
+def test_queued_text_is_stored_once_and_claimed(tmp_path):
+    store = Store(str(tmp_path / 'treebank.sqlite3'))
+    assert store.add_texts(['Mo lọ', 'Mo lọ', ''], 'file.txt') == 1
+    assert store.add_texts(['Mo lọ'], 'file.txt') == 0
+    id, text = store.claim('B')
+    assert text == 'Mo lọ' and not store.pending()[1:]
+    assert store.annotate(id, BLOCK)
+    assert not store.annotate(id, BLOCK)
+    assert len(store) == 1
+
+
+def test_annotation_already_stored_drops_the_queued_copy(tmp_path):
+    store = Store(str(tmp_path / 'treebank.sqlite3'))
+    store.add(BLOCK)
+    store.add_texts(['Mo lọ'], 'file.txt')
+    id, _ = store.claim('A')
+    assert store.annotate(id, BLOCK)
+    assert store.pending() == [] and len(store) == 1
+
+
+def test_older_databases_gain_the_digest_column(tmp_path):
+    path = str(tmp_path / 'treebank.sqlite3')
+    with sqlite3.connect(path) as connection:
+        connection.execute('CREATE TABLE sentences (id INTEGER PRIMARY KEY, sent_id TEXT, text TEXT NOT NULL, annotator TEXT, '
+                           "source TEXT NOT NULL DEFAULT 'OTHER', comments TEXT NOT NULL, annotated INTEGER NOT NULL DEFAULT 1, "
+                           'claimed_by TEXT, claimed_at REAL, updated REAL NOT NULL)')
+    store = Store(path)
+    assert store.add(BLOCK) is not None and store.add(BLOCK) is None
+
+
+def test_a_malformed_block_does_not_cost_its_neighbours(tmp_path):
+    store, errors = Store(str(tmp_path / 'treebank.sqlite3')), []
+    short = '# sent_id = s2\n1\tMo\n2\tlọ\tlọ\n\n'
+    assert store.add_many([BLOCK, short, BLOCK.replace('= A', '= B')], errors=errors) == 2
+    assert len(store) == 2
+    assert [position for position, _ in errors] == [1]
+
+
+def test_error_positions_run_across_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(store_module, 'BATCH_SIZE', 2)
+    store, errors = Store(str(tmp_path / 'treebank.sqlite3')), []
+    blocks = [BLOCK.replace('s1', f's{i}') if i != 3 else '1\tMo\n\n' for i in range(5)]
+    assert store.add_many(blocks, errors=errors) == 4
+    assert [position for position, _ in errors] == [3]
@@ -0,0 +1,33 @@
+import io
+
+from core import convert
+from tokenizer import get_tokenizer, tokenize
+
+
+def test_last_word_is_kept_without_final_punctuation():
+    assert get_tokenizer().tokenize('Mo lọ sí ọjà') == ['Mo', 'lọ', 'sí', 'ọjà']
+    assert get_tokenizer().tokenize_batch(['Mo lọ .', 'Ó dára']) == [['Mo', 'lọ', '.'], ['Ó', 'dára']]
+
+
+def test_any_whitespace_separates_tokens():
+    assert get_tokenizer().tokenize('Mo\tlọ  sí\nilé.') == ['Mo', 'lọ', 'sí', 'ilé', '.']
+
+
+def test_combining_marks_stay_with_punctuation():
+    assert get_tokenizer().tokenize('a.\u0301b c') == ['a', '.\u0301', 'b', 'c']
+
+
+def test_shim_keeps_the_old_quirks():
+    assert list(tokenize('a.\u0301b c')) == ['a', '.', '\u0301b']
+    assert list(tokenize('Mo lọ')) == ['Mo']
+    assert list(tokenize('')) == []
+
+
+def test_convert_writes_every_word():
+    out = io.StringIO()
+    assert convert(['Mo lo si oja\n', '\n', 'A\tb c.\n'], out) == 2
+    blocks = out.getvalue().strip('\n').split('\n\n')
+    assert '# Text = Mo lo si oja' in blocks[0]
+    assert [line.split('\t')[1] for line in blocks[0].split('\n') if not line.startswith('#')] == ['Mo', 'lo', 'si', 'oja']
+    assert '# Text = A b c.' in blocks[1]
+    assert all(len(line.split('\t')) == 10 for block in blocks for line in block.split('\n') if not line.startswith('#'))
@@ -0,0 +1,35 @@
+import pytest
+
+from tokenstore import DuplicateTokenError, Token, TokenStore
+
+
+def test_tokens_come_out_in_id_order_however_they_were_tagged():
+    store = TokenStore()
+    for id in (3, 1, 4, 2):
+        store.add(Token(id, f'w{id}'))
+    assert store.ids() == [1, 2, 3, 4]
+    assert [token.FORM for token in store] == ['w1', 'w2', 'w3', 'w4']
+    assert list(store.to_frame()['ID']) == [1, 2, 3, 4]
+
+
+def test_a_second_token_with_the_same_id_is_refused():
+    store = TokenStore([Token(1, 'Mo', HEAD='2')])
+    with pytest.raises(DuplicateTokenError):
+        store.add(Token(1, 'lọ'))
+    assert len(store) == 1 and store[1].FORM == 'Mo'
+
+
+def test_replace_keeps_the_position_and_the_frame_follows():
+    store = TokenStore([Token(1, 'Mo'), Token(2, 'lọ')])
+    assert store.to_frame()['UPOS'].tolist() == ['_', '_']
+    store.replace(Token(1, 'Mo', UPOS='PRON', HEAD='2'))
+    assert store.ids() == [1, 2]
+    assert store.to_frame()['UPOS'].tolist() == ['PRON', '_']
+    with pytest.raises(KeyError):
+        store.replace(Token(3, 'ni'))
+
+
+def test_a_frame_round_trip_keeps_every_token():
+    store = TokenStore([Token(2, 'lọ', 'lọ', 'VERB', HEAD=0, DEPREL='root'), Token(1, 'Mo', HEAD='_')])
+    assert list(TokenStore.from_frame(store.to_frame())) == list(store)
+    assert store[1].HEAD is None
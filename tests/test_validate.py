@@ -0,0 +1,42 @@
+import pytest
+from conllu import parse
+
+from tagsets import FEAT
+from validate import ERROR, RAW, check_sentence
+
+SENTENCE = '''# sent_id = t1
+1\tMo\tmo\tPRON\t_\t{feats}\t2\tnsubj\t{deps}\t_
+2\tlọ\tlọ\tVERB\t_\t_\t0\troot\t0:root\t_
+
+'''
+
+
+def errors(feats='_', deps='2:nsubj', raw=False):
+    text = SENTENCE.format(feats=feats, deps=deps)
+    sentence = parse(text, field_parsers=RAW)[0] if raw else parse(text)[0]
+    return [issue.message for issue in check_sentence(sentence) if issue.level == ERROR]
+
+
+@pytest.mark.parametrize('feat', [feat for feat in FEAT if feat != '_'])
+def test_app_features_are_valid(feat):
+    assert errors(feats=feat) == []
+
+
+@pytest.mark.parametrize('raw', [False, True])
+def test_feature_values_with_hyphens(raw):
+    assert errors(feats='Number=Sing|Tense=Non-Fut', raw=raw) == []
+
+
+@pytest.mark.parametrize('raw', [False, True])
+def test_malformed_feats(raw):
+    assert [message for message in errors(feats='tense=past', raw=raw) if message.startswith('MALFORMED FEATS')]
+
+
+@pytest.mark.parametrize('raw', [False, True])
+def test_deps_on_empty_node(raw):
+    assert errors(deps='2.1:nsubj', raw=raw) == []
+
+
+@pytest.mark.parametrize('raw', [False, True])
+def test_deps_out_of_range(raw):
+    assert [message for message in errors(deps='3.1:nsubj', raw=raw) if message.startswith('MALFORMED DEPS')]
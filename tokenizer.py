@@ -0,0 +1,64 @@
+import re
+import string
+
+PUNCTUATION = string.punctuation + '£¢©¥≤ϵ≥™≠ꓯ÷®₦№℗'
+
+# Combining marks that follow a punctuation character stay with it instead of leaking onto the next word.
+# Only Tokenizer.tokenize() does this; the tokenize() shim splits exactly like the old function, quirks and all.
+COMBINING = '\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f'
+
+
+class Tokenizer:
+    __slots__ = ('punctuation', 'multiwords', '_pattern', '_longest')
+
+    def __init__(self, punctuation: str = PUNCTUATION, multiwords=()):
+        self.punctuation = frozenset(punctuation)
+        self.multiwords = frozenset(tuple(mw.split()) for mw in multiwords if mw.split())
+        chars = ''.join(re.escape(char) for char in sorted(self.punctuation))
+        self._pattern = re.compile(f'([{chars}][{COMBINING}]*)') if chars else None
+        self._longest = max((len(mw) for mw in self.multiwords), default=0)
+
+    def tokenize(self, text: str):
+        '''Every word and punctuation mark of `text`, split on any whitespace, tabs and newlines included.'''
+        if self._pattern is not None:
+            text = self._pattern.sub(r' \1 ', text)
+        tokens = text.split()
+        return self._merge(tokens) if self.multiwords else tokens
+
+    def tokenize_batch(self, texts):
+        return [self.tokenize(text) for text in texts]
+
+    def _merge(self, tokens):
+        merged, i = [], 0
+        while i < len(tokens):
+            for n in range(min(self._longest, len(tokens) - i), 1, -1):
+                if tuple(tokens[i:i + n]) in self.multiwords:
+                    merged.append(' '.join(tokens[i:i + n]))
+                    i += n
+                    break
+            else:
+                merged.append(tokens[i])
+                i += 1
+        return merged
+
+
+LANGUAGES = {'default': Tokenizer(),
+             'yo': Tokenizer(PUNCTUATION + '“”‘’«»…–—')}
+
+
+def get_tokenizer(language: str = 'default'):
+    return LANGUAGES.get(language, LANGUAGES['default'])
+
+
+_LEGACY = re.compile(f'([{"".join(re.escape(char) for char in sorted(set(PUNCTUATION)))}])')
+
+
+def tokenize(text: str):
+    '''The original function, kept for old callers: pieces between single spaces, empty ones included, and the last
+    piece dropped unless the text ends in punctuation or a space. New code should use get_tokenizer().tokenize().'''
+    if text:
+        yield from _LEGACY.sub(r' \1 ', text).split(' ')[:-1]
+
+
+def tokenize_batch(texts, language: str = 'default'):
+    return get_tokenizer(language).tokenize_batch(texts)
@@ -0,0 +1,89 @@
+from bisect import insort
+
+import pandas as pd
+
+COLUMNS = ('ID', 'FORM', 'LEMMA', 'UPOS', 'XPOS', 'FEATS', 'HEAD', 'DEPREL', 'DEPS', 'MISC')
+
+
+class DuplicateTokenError(KeyError):
+    pass
+
+
+class Token:
+    __slots__ = COLUMNS
+
+    def __init__(self, ID, FORM, LEMMA='_', UPOS='_', XPOS='_', FEATS='_', HEAD=None, DEPREL='_', DEPS='_', MISC='_'):
+        self.ID = int(ID)
+        self.FORM = FORM
+        self.LEMMA = LEMMA or '_'
+        self.UPOS = UPOS or '_'
+        self.XPOS = XPOS or '_'
+        self.FEATS = FEATS or '_'
+        self.HEAD = None if pd.isna(HEAD) or HEAD == '_' else int(HEAD)
+        self.DEPREL = DEPREL or '_'
+        self.DEPS = DEPS or '_'
+        self.MISC = MISC or '_'
+
+    def __iter__(self):
+        for column in COLUMNS:
+            yield getattr(self, column)
+
+    def __eq__(self, other):
+        return isinstance(other, Token) and tuple(self) == tuple(other)
+
+    def __repr__(self):
+        return f'Token({", ".join(repr(value) for value in self)})'
+
+
+class TokenStore:
+    '''Tokens tagged for one sentence, keyed by ID and kept in ID order. A DataFrame is only built when asked for.'''
+    __slots__ = ('_tokens', '_ids', '_frame')
+
+    def __init__(self, tokens=()):
+        self._tokens = {}
+        self._ids = []
+        self._frame = None
+        for token in tokens:
+            self.add(token)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, id):
+        return id in self._tokens
+
+    def __getitem__(self, id):
+        return self._tokens[id]
+
+    def __iter__(self):
+        for id in self._ids:
+            yield self._tokens[id]
+
+    def ids(self):
+        return list(self._ids)
+
+    def add(self, token: Token):
+        if token.ID in self._tokens:
+            raise DuplicateTokenError(token.ID)
+        self._tokens[token.ID] = token
+        if not self._ids or token.ID > self._ids[-1]:
+            self._ids.append(token.ID)
+        else:
+            insort(self._ids, token.ID)
+        self._frame = None
+
+    def replace(self, token: Token):
+        if token.ID not in self._tokens:
+            raise KeyError(token.ID)
+        self._tokens[token.ID] = token
+        self._frame = None
+
+    def to_frame(self):
+        if self._frame is None:
+            self._frame = pd.DataFrame([tuple(token) for token in self], columns=list(COLUMNS))
+            self._frame = self._frame.astype({'ID': int, 'HEAD': 'Int64'})
+        return self._frame
+
+    @classmethod
+    def from_frame(cls, frame):
+        return cls(Token(*row) for row in frame[list(COLUMNS)].itertuples(index=False, name=None))
@@ -0,0 +1,158 @@
+import argparse
+import re
+import sys
+from time import perf_counter
+from typing import NamedTuple
+
+import numpy as np
+
+from corpus import iter_sentences
+from tagsets import DEPREL, UPOS
+
+ERROR = 'ERROR'
+WARNING = 'WARNING'
+
+UPOS_TAGS = frozenset(UPOS)
+DEPRELS = frozenset(DEPREL) | {'root'}
+# values may carry hyphens, dots and underscores after the first character, as in Tense=Non-Fut
+FEATURE = re.compile(r'[A-Z][A-Za-z0-9]*(\[[a-z0-9]+\])?=[A-Z0-9][A-Za-z0-9_.-]*(,[A-Z0-9][A-Za-z0-9_.-]*)*')
+DEP = re.compile(r'(0|[1-9][0-9]*(\.[1-9][0-9]*)?):\S+')
+# FEATS and DEPS are kept as written so malformed values are not silently repaired by the parser
+RAW = {'feats': lambda line, i: line[i], 'deps': lambda line, i: line[i]}
+
+
+class Issue(NamedTuple):
+    line: int
+    sent_id: str
+    token: object
+    level: str
+    message: str
+
+
+def _feats_ok(feats):
+    if feats in (None, '_'):
+        return True
+    if isinstance(feats, dict):
+        feats = '|'.join(f'{key}={value}' for key, value in feats.items())
+    return all(FEATURE.fullmatch(feat) for feat in feats.split('|'))
+
+
+def _head(head):
+    '''A DEPS head as written; conllu parses an empty node head like 2.1 into (2, '.', 1).'''
+    return ''.join(map(str, head)) if isinstance(head, tuple) else head
+
+
+def _deps_ok(deps, n: int):
+    if deps in (None, '_'):
+        return True
+    if not isinstance(deps, str):
+        deps = '|'.join(f'{_head(head)}:{rel}' for rel, head in deps)
+    for dep in deps.split('|'):
+        match = DEP.fullmatch(dep)
+        # an empty node n.1 follows word n, so only the word part has to be in range
+        if not match or int(match.group(1).split('.')[0]) > n:
+            return False
+    return True
+
+
+def check_sentence(sentence, line: int = 0):
+    issues = []
+    sent_id = sentence.metadata.get('sent_id', '')
+
+    def report(token, level, message):
+        issues.append(Issue(line, sent_id, token, level, message))
+
+    words = [token for token in sentence if isinstance(token['id'], int)]
+    n = len(words)
+    if not n:
+        report(None, ERROR, 'SENTENCE HAS NO WORDS')
+        return issues
+    ids = np.fromiter((token['id'] for token in words), dtype=np.int64, count=n)
+    heads = np.fromiter((-1 if token.get('head') is None else token['head'] for token in words), dtype=np.int64, count=n)
+    is_root = np.fromiter((str(token.get('deprel')).lower() == 'root' for token in words), dtype=bool, count=n)
+
+    structure_ok = True
+    if not np.array_equal(ids, np.arange(1, n + 1)):
+        report(int(ids[np.argmax(ids != np.arange(1, n + 1))]), ERROR, f'IDS MUST RUN FROM 1 TO {n} IN ORDER')
+        structure_ok = False
+    for id in ids[heads == -1]:
+        report(int(id), ERROR, 'HEAD IS MISSING')
+    for id in ids[(heads < -1) | (heads > n)]:
+        report(int(id), ERROR, f'HEAD IS OUT OF RANGE 0-{n}')
+    for id in ids[heads == ids]:
+        report(int(id), ERROR, 'TOKEN IS ITS OWN HEAD')
+    if ((heads < 0) | (heads > n) | (heads == ids)).any():
+        structure_ok = False
+
+    roots = heads == 0
+    if not roots.any():
+        report(None, ERROR, 'SENTENCE HAS NO ROOT')
+    elif roots.sum() > 1:
+        report(None, ERROR, f'SENTENCE HAS {int(roots.sum())} ROOTS: {", ".join(map(str, ids[roots]))}')
+    for id in ids[roots != is_root]:
+        report(int(id), ERROR, 'DEPREL MUST BE ROOT IF AND ONLY IF HEAD IS 0')
+
+    if structure_ok:
+        # pointer doubling: after ceil(log2(n)) + 1 jumps every node that reaches the root points at 0
+        ancestors = np.concatenate(([0], heads))
+        for _ in range(int(np.ceil(np.log2(n + 1))) + 1):
+            ancestors = ancestors[ancestors]
+        unreached = ids[ancestors[1:] != 0]
+        if unreached.size:
+            report(None, ERROR, f'CYCLE: TOKENS {", ".join(map(str, unreached))} DO NOT REACH THE ROOT')
+        else:
+            low, high = np.minimum(ids, heads), np.maximum(ids, heads)
+            crossing = (low[:, None] < low[None, :]) & (low[None, :] < high[:, None]) & (high[:, None] < high[None, :])
+            crossed = ids[crossing.any(axis=0) | crossing.any(axis=1)]
+            if crossed.size:
+                report(None, WARNING, f'NON-PROJECTIVE ARCS INTO TOKENS {", ".join(map(str, crossed))}')
+
+    for token in words:
+        if token.get('upos') not in UPOS_TAGS:
+            report(token['id'], ERROR, f'UNKNOWN UPOS {token.get("upos")!r}')
+        if token.get('deprel') not in DEPRELS:
+            report(token['id'], ERROR, f'UNKNOWN DEPREL {token.get("deprel")!r}')
+        if not _feats_ok(token.get('feats')):
+            report(token['id'], ERROR, f'MALFORMED FEATS {token.get("feats")!r}')
+        if not _deps_ok(token.get('deps'), n):
+            report(token['id'], ERROR, f'MALFORMED DEPS {token.get("deps")!r}')
+    return issues
+
+
+def validate(sentences):
+    '''Checks (line, sentence, parse error) triples as yielded by corpus.iter_sentences().'''
+    for line, sentence, error in sentences:
+        if error is not None:
+            yield Issue(line, '', None, ERROR, error)
+        else:
+            yield from check_sentence(sentence, line)
+
+
+def validate_file(path: str):
+    with open(path, encoding='utf-8') as stream:
+        yield from validate(iter_sentences(stream, field_parsers=RAW))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='CHECK CONLL-U TREEBANKS FOR WELL-FORMED DEPENDENCY TREES.')
+    parser.add_argument('files', nargs='+', help='.conllu or .txt files to check')
+    parser.add_argument('--no-warnings', action='store_true', help='only report errors')
+    args = parser.parse_args(argv)
+
+    start, errors, warnings = perf_counter(), 0, 0
+    for path in args.files:
+        for issue in validate_file(path):
+            if issue.level == ERROR:
+                errors += 1
+            else:
+                warnings += 1
+                if args.no_warnings:
+                    continue
+            where = f'{issue.sent_id or "?"}' + (f' #{issue.token}' if issue.token is not None else '')
+            print(f'{path}:{issue.line}: {issue.level} [{where}] {issue.message}')
+    print(f'{len(args.files)} FILE(S) CHECKED IN {perf_counter() - start:.2f}s: {errors} ERROR(S), {warnings} WARNING(S)', file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
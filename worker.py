@@ -0,0 +1,51 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+from weakref import WeakKeyDictionary
+
+from metrics import timed
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix='export')
+_JOBS = WeakKeyDictionary()
+
+
+class ExportJob:
+    '''Serializes a snapshot of a corpus to bytes on a worker thread.'''
+    __slots__ = ('version', 'sentences', 'total', 'written', 'future')
+
+    def __init__(self, corpus):
+        self.version = corpus.version
+        self.sentences = len(corpus)
+        self.total = corpus.size
+        self.written = 0
+        self.future = _EXECUTOR.submit(self._run, corpus)
+
+    def _run(self, corpus):
+        with timed('download_build', sentences=self.sentences, bytes=self.total):
+            buffer = io.BytesIO()
+            for chunk in corpus.iter_chunks(count=self.sentences):
+                buffer.write(chunk)
+                self.written += len(chunk)
+            return buffer.getvalue()
+
+    @property
+    def progress(self):
+        return self.written / self.total if self.total else 1.0
+
+    def done(self):
+        return self.future.done()
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+
+def export(corpus):
+    '''The export job for the corpus as it is now. Jobs are shared until the corpus changes, so every caller gets the same payload.'''
+    job = _JOBS.get(corpus)
+    if job is None or job.version != corpus.version:
+        job = _JOBS[corpus] = ExportJob(corpus)
+    return job
+
+
+def run(function, *args):
+    '''Runs housekeeping such as saving the lexicon off the script thread.'''
+    return _EXECUTOR.submit(function, *args)